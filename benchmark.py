@@ -0,0 +1,276 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import biliraku
+from mock_server import start_mock_server
+
+
+HISTOGRAM_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+PHASES = {
+    'question_fetch': 'question_get',
+    'submit': 'question_submit',
+    'result': 'question_result',
+    'category': 'category_get',
+    'captcha_fetch': 'captcha_get',
+    'captcha_download': 'download_captcha_image',
+    'captcha_recognize': 'recognize_with_jfbym',
+    'captcha_submit': 'captcha_submit',
+}
+
+
+class PhaseRecorder:
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, phase, seconds):
+
+        with self.lock:
+            self.samples.setdefault(phase, []).append(seconds)
+
+    def wrap(self, phase, func):
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - started)
+        return timed
+
+    def summary(self):
+
+        with self.lock:
+            samples = {phase: sorted(values) for phase, values in self.samples.items()}
+        return {phase: summarize(values) for phase, values in samples.items()}
+
+
+def percentile(values, q):
+
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def summarize(values):
+
+    histogram = {}
+    for bucket in HISTOGRAM_BUCKETS + [float('inf')]:
+        label = '+Inf' if bucket == float('inf') else str(bucket)
+        histogram[label] = sum(1 for value in values if value <= bucket)
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 6) if values else None,
+        'p50': round(percentile(values, 0.5), 6) if values else None,
+        'p90': round(percentile(values, 0.9), 6) if values else None,
+        'p99': round(percentile(values, 0.99), 6) if values else None,
+        'max': round(values[-1], 6) if values else None,
+        'histogram': histogram,
+    }
+
+
+class FakeEngine(biliraku.AnswerEngine):
+    name = 'fake'
+
+    def __init__(self, state, latency=0.0, accuracy=0.8, recorder=None):
+        self.correct = {item['question']: item['correct'] + 1 for item in state.bank}
+        self.latency = latency
+        self.accuracy = accuracy
+        self.recorder = recorder
+
+    def ask(self, question, timeout=30):
+        return self.answer(*biliraku.parse_question_prompt(question), timeout=timeout)
+
+    def answer(self, question, options, timeout=30):
+
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        correct = self.correct.get(question, 1)
+        if random.random() < self.accuracy:
+            choice = correct
+        else:
+            choice = random.choice([i for i in range(1, len(options) + 1) if i != correct] or [correct])
+        if self.recorder:
+            self.recorder.add('answer', time.perf_counter() - started)
+        return str(choice)
+
+
+class NullAnswerBank(biliraku.AnswerBank):
+
+    def lookup(self, question, answers):
+        return None
+
+    def save(self):
+        pass
+
+
+def peak_rss_mb():
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return round(peak / 1024 / 1024, 2)
+    return round(peak / 1024, 2)
+
+def git_revision():
+
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def run_level(concurrency, sessions, state, args, bank_dir):
+
+    recorder = PhaseRecorder()
+    originals = {name: getattr(biliraku, name) for name in PHASES.values()}
+    for phase, name in PHASES.items():
+        setattr(biliraku, name, recorder.wrap(phase, originals[name]))
+
+    if args.no_answer_bank:
+        biliraku.answer_bank = NullAnswerBank(os.path.join(bank_dir, f'bank_{concurrency}.json'))
+    else:
+        biliraku.answer_bank = biliraku.AnswerBank(os.path.join(bank_dir, f'bank_{concurrency}.json'))
+    biliraku.captcha_cache = biliraku.CaptchaCache(os.path.join(bank_dir, f'captcha_{concurrency}'))
+
+    engine = FakeEngine(state, latency=args.engine_latency, accuracy=args.engine_accuracy, recorder=recorder)
+    scores = []
+
+    def run_one(index):
+        account = biliraku.BiliAccount(
+            access_token=f'bench-{concurrency}-{index}-{time.time_ns()}',
+            mid=str(100000 + index),
+            name=f'bench-{index}'
+        )
+        quiz = biliraku.QuizSession(account=account, interactive=False, engine=engine, pipeline=args.pipeline)
+        started = time.perf_counter()
+        quiz.start()
+        recorder.add('session', time.perf_counter() - started)
+        result = quiz.final_result or {}
+        return result.get('score')
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench') as executor:
+            scores = list(executor.map(run_one, range(sessions)))
+    finally:
+        for name, func in originals.items():
+            setattr(biliraku, name, func)
+    elapsed = time.perf_counter() - started
+
+    completed = [score for score in scores if score is not None]
+    return {
+        'concurrency': concurrency,
+        'sessions': sessions,
+        'completed': len(completed),
+        'elapsed': round(elapsed, 3),
+        'sessions_per_minute': round(len(completed) * 60 / elapsed, 2) if elapsed else None,
+        'mean_score': round(sum(completed) / len(completed), 2) if completed else None,
+        'phases': recorder.summary(),
+    }
+
+
+def compare(current, baseline_path):
+
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {level['concurrency']: level for level in baseline.get('levels', [])}
+    print(f"\n与基线对比 ({baseline.get('revision')} -> {current.get('revision')}):")
+    for level in current['levels']:
+        old = previous.get(level['concurrency'])
+        if not old or not old.get('sessions_per_minute'):
+            continue
+        change = (level['sessions_per_minute'] - old['sessions_per_minute']) / old['sessions_per_minute'] * 100
+        print(f"  并发 {level['concurrency']:>3}: {old['sessions_per_minute']} -> {level['sessions_per_minute']} 场/分钟 ({change:+.1f}%)")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='答题流程端到端性能基准测试(使用本地模拟服务器)')
+    parser.add_argument('--concurrency', default='1,4,16', help='逗号分隔的并发级别')
+    parser.add_argument('--sessions', type=int, default=16, help='每个并发级别运行的答题场次')
+    parser.add_argument('--questions', type=int, default=100, help='每场答题的题目数')
+    parser.add_argument('--latency', type=float, default=0.01, help='模拟服务器每个请求的固定延迟(秒)')
+    parser.add_argument('--jitter', type=float, default=0.01, help='模拟服务器的随机延迟上限(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='模拟服务器返回HTTP 500的概率')
+    parser.add_argument('--engine-latency', type=float, default=0.05, help='模拟答题引擎的作答耗时(秒)')
+    parser.add_argument('--engine-accuracy', type=float, default=0.8, help='模拟答题引擎的正确率')
+    parser.add_argument('--pipeline', action='store_true', help='题库写入放到后台线程')
+    parser.add_argument('--rate-limit', action='store_true', help='启用按接口分组的请求限流(默认关闭，模拟服务器没有反爬限制)')
+    parser.add_argument('--no-answer-bank', action='store_true', help='禁用本地题库命中')
+    parser.add_argument('--output', default=None, help='结果JSON的保存路径')
+    parser.add_argument('--compare', metavar='FILE', help='与之前保存的结果JSON对比')
+    args = parser.parse_args()
+
+    biliraku.logger.setLevel(logging.WARNING)
+
+    server, state, base_url = start_mock_server(
+        questions=args.questions,
+        daily_limit=10 ** 6,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+    biliraku.set_base_urls(base_url, base_url)
+    biliraku.JFBYM_API_URL = f'{base_url}/api/YmServer/customApi'
+    biliraku.JFBYM_TOKEN = 'benchmark'
+    biliraku.USE_CLOUD_CAPTCHA = True
+    biliraku.AUTO_SELECT_CATEGORY = True
+
+    levels = []
+    with tempfile.TemporaryDirectory(prefix='biliraku-bench-') as bank_dir:
+        if args.rate_limit:
+            biliraku.rate_limiter.configure(directory=os.path.join(bank_dir, 'ratelimit'))
+        else:
+            biliraku.rate_limiter.disable()
+        try:
+            for concurrency in [int(level) for level in args.concurrency.split(',') if level.strip()]:
+                print(f"运行并发级别 {concurrency}，共 {args.sessions} 场...")
+                level = run_level(concurrency, args.sessions, state, args, bank_dir)
+                print(f"  完成 {level['completed']}/{level['sessions']} 场，耗时 {level['elapsed']}s，"
+                      f"{level['sessions_per_minute']} 场/分钟，平均得分 {level['mean_score']}")
+                levels.append(level)
+        finally:
+            server.shutdown()
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'config': vars(args),
+        'peak_rss_mb': peak_rss_mb(),
+        'levels': levels,
+        'metrics': biliraku.metrics.snapshot(),
+    }
+
+    output = args.output or os.path.join(biliraku.LOG_DIR, f'bench_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"峰值内存: {report['peak_rss_mb']} MB")
+    print(f"基准测试结果已保存到: {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,46 +5,56 @@ import time
 import base64
 import hashlib
 import random
+import re
 import urllib.parse
 import logging
-import requests
-import urllib3
+import threading
+import functools
+import struct
+import contextvars
+import unicodedata
 import warnings
-import webbrowser
-import tempfile
-import platform
-import argparse
+import weakref
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from io import BytesIO
 from typing import Dict, Any, Optional
-from qrcode.main import QRCode
-from qrcode.constants import ERROR_CORRECT_L
-from qrcode import make as qrcode_make
-from PIL import Image
+from contextlib import contextmanager
 
 
 
 warnings.filterwarnings('ignore')
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-requests.packages.urllib3.disable_warnings()
-urllib3.disable_warnings()  
 
 
 APP_NAME = 'biliraku'
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_DIR = os.path.join(BASE_DIR, 'logs')
-os.makedirs(LOG_DIR, exist_ok=True)
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 10
+LOG_RETENTION_DAYS = 14
+LOG_QUEUE_SIZE = 10000
 
 
 USER_CONFIG_DIR = os.path.join(os.path.expanduser('~'), f'.{APP_NAME}')
-os.makedirs(USER_CONFIG_DIR, exist_ok=True)
 
 
 AUTH_FILE = os.path.join(USER_CONFIG_DIR, 'auth.json')
 DEEPSEEK_KEY_FILE = os.path.join(USER_CONFIG_DIR, 'deepseek_key.json')
 CLOUD_CONFIG_FILE = os.path.join(USER_CONFIG_DIR, 'jfbym_key.json')
 CATEGORY_CONFIG_FILE = os.path.join(USER_CONFIG_DIR, 'category_config.json')
+ANSWER_BANK_FILE = os.path.join(USER_CONFIG_DIR, 'answer_bank.json')
+CAPTCHA_CACHE_DIR = os.path.join(USER_CONFIG_DIR, 'captcha')
+ACCOUNT_DB_FILE = os.path.join(USER_CONFIG_DIR, 'accounts.db')
+ACCOUNT_KEY_FILE = os.path.join(USER_CONFIG_DIR, 'accounts.key')
+RATE_LIMIT_DIR = os.path.join(USER_CONFIG_DIR, 'ratelimit')
+SECRET_STORE_CHECKED = False
+DAILY_ATTEMPT_LIMIT = 3
+FAILURE_BACKOFF = 300
+FAILURE_MAX_BACKOFF = 6 * 3600
+CAPTCHA_WRONG_CODE = 41023
+QUOTA_TIMEZONE = timezone(timedelta(hours=8))
 
 
 
@@ -75,9 +85,35 @@ HEADERS = {
 }
 
 
+API_BASE_URL = os.environ.get('BILIRAKU_API_BASE', 'https://api.bilibili.com').rstrip('/')
+PASSPORT_BASE_URL = os.environ.get('BILIRAKU_PASSPORT_BASE', 'https://passport.bilibili.com').rstrip('/')
+
+
+REQUEST_TIMEOUT = 15
+HOST_CONNECTION_LIMIT = 8
+HTTP_POOL_SIZE = 10
+HTTP_RETRY_TOTAL = 3
+HTTP_STATUS_RETRIES = 1
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 5.0
+CIRCUIT_MAX_COOLDOWN = 120.0
+DEFAULT_RATE_LIMITS = {
+    'senior': (4.0, 8),
+    'passport': (2.0, 4),
+    'captcha_image': (2.0, 4),
+    'deepseek': (8.0, 16),
+    'jfbym': (4.0, 8),
+}
+JFBYM_API_URL = "http://api.jfbym.com/api/YmServer/customApi"
+
+
 JFBYM_TOKEN = ""
 JFBYM_TYPE = "10103"
 USE_CLOUD_CAPTCHA = False
+CAPTCHA_BACKEND = 'cloud'
+LOCAL_CAPTCHA_MODEL = ''
+LOCAL_CAPTCHA_CHARSET = ''
+CAPTCHA_RACE = False
 AUTO_SELECT_CATEGORY = False
 AUTO_CATEGORY_ID = '6'
 
@@ -85,7 +121,18 @@ AUTO_CATEGORY_ID = '6'
 access_token = None
 csrf = None
 API_KEY_DEEPSEEK = None
+DEFAULT_DEEPSEEK_STREAM = True
+DEFAULT_DEEPSEEK_MAX_TOKENS = 8
+DEFAULT_ENSEMBLE_SAMPLES = 3
+DEFAULT_ENSEMBLE_DEADLINE = 10
+DEEPSEEK_STREAM = DEFAULT_DEEPSEEK_STREAM
+DEEPSEEK_MAX_TOKENS = DEFAULT_DEEPSEEK_MAX_TOKENS
+ANSWER_ENGINE_CONFIG = {}
 login_count = 0
+TOKEN_REFRESH_MARGIN = 7 * 24 * 3600
+
+
+ANSWER_PATTERN = re.compile(r'[1-4]')
 
 
 PROMPT = """当前时间：{}
@@ -106,60 +153,835 @@ PROMPT = """当前时间：{}
 """
 
 
-def setup_logger(name=APP_NAME):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+BATCH_PROMPT = """你是一个高效、精准的答题专家。下面是多道选择题，每行是一道题的JSON，包含编号id、题目question和选项options。请为每道题判断最可能的正确答案，并给出对应选项的序号（从1开始）。
+
+只输出JSON，格式为：{{"answers": [{{"id": 题目编号, "answer": 选项序号}}]}}，必须覆盖所有题目，不提供额外解释。
+
+---
+
+{}
+"""
+
+
+log_session = contextvars.ContextVar('log_session', default=None)
+log_account = contextvars.ContextVar('log_account', default=None)
+
+
+@contextmanager
+def log_context(account=None, session=None):
+
+    session_token = log_session.set(session or os.urandom(4).hex())
+    account_token = log_account.set(account if account is not None else log_account.get())
+    try:
+        yield log_session.get()
+    finally:
+        log_account.reset(account_token)
+        log_session.reset(session_token)
+
+def submit_in_context(executor, func, *args, **kwargs):
+
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+class LogContextFilter(logging.Filter):
+
+    def filter(self, record):
+        record.session = log_session.get()
+        record.account = log_account.get()
+        return True
+
+
+class JsonLogFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for field in ('session', 'account'):
+            value = getattr(record, field, None)
+            if value:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LazyFileHandler(logging.FileHandler):
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+def log_file_path(directory=LOG_DIR):
+
+    return os.path.join(directory, f'{APP_NAME}_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}_{os.getpid()}.log')
+
+
+class RotatingLogFileHandler(LazyFileHandler):
+    EXPIRABLE = re.compile(
+        rf'^({re.escape(APP_NAME)}_\d{{4}}-\d{{2}}-\d{{2}}_\d{{2}}-\d{{2}}-\d{{2}}_\d+\.log(\.\d+\.gz)?'
+        rf'|\d{{4}}-\d{{2}}-\d{{2}}_\d{{2}}-\d{{2}}-\d{{2}}\.log'
+        rf'|{re.escape(APP_NAME)}\.log(\.\d+\.gz)?)$'
+    )
+
+    def __init__(self, directory=LOG_DIR, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                 retention_days=LOG_RETENTION_DAYS, encoding='utf-8'):
+        super().__init__(log_file_path(directory), encoding=encoding, delay=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.retention_days = retention_days
+        self.opened_day = None
+        self.pid = os.getpid()
+
+    def _open(self):
+        stream = super()._open()
+        if self.opened_day is None:
+            try:
+                stream.seek(0, os.SEEK_END)
+                opened = os.path.getmtime(self.baseFilename) if stream.tell() else time.time()
+            except OSError:
+                opened = time.time()
+            self.opened_day = datetime.fromtimestamp(opened).date()
+            self.remove_expired()
+        return stream
+
+    def should_rollover(self, record):
+
+        if self.stream is None:
+            self.stream = self._open()
+        if datetime.fromtimestamp(record.created).date() != self.opened_day:
+            return self.stream.tell() > 0
+        return self.max_bytes > 0 and self.stream.tell() >= self.max_bytes
+
+    def backup_name(self, index):
+        return f'{self.baseFilename}.{index}.gz'
+
+    def rollover(self):
+
+        import gzip
+        import shutil
+
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.backup_name(index)
+            if os.path.exists(source):
+                os.replace(source, self.backup_name(index + 1))
+        if self.backup_count > 0 and os.path.exists(self.baseFilename):
+            tmp_path = f'{self.backup_name(1)}.tmp'
+            with open(self.baseFilename, 'rb') as source, gzip.open(tmp_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.replace(tmp_path, self.backup_name(1))
+        if os.path.exists(self.baseFilename):
+            os.remove(self.baseFilename)
+        self.opened_day = None
+
+    def remove_expired(self):
+
+        cutoff = time.time() - self.retention_days * 86400
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if path == self.baseFilename or not self.EXPIRABLE.match(name):
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def emit(self, record):
+
+        try:
+            if self.pid != os.getpid():
+                self.stream = None
+                self.opened_day = None
+                self.pid = os.getpid()
+                self.baseFilename = os.path.abspath(log_file_path(self.directory))
+            if self.should_rollover(record):
+                self.rollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+
+class BackgroundLogHandler(logging.Handler):
+
+    def __init__(self, *handlers, maxsize=LOG_QUEUE_SIZE):
+        super().__init__()
+        self.targets = handlers
+        self.maxsize = maxsize
+        self.queue = None
+        self.thread = None
+        self.dropped = 0
+        self.pid = os.getpid()
+        self.start_lock = threading.Lock()
+
+    def start(self):
+
+        import queue
+
+        with self.start_lock:
+            if self.queue is None:
+                self.queue = queue.Queue(self.maxsize)
+                self.thread = threading.Thread(target=self.drain, name='log-writer', daemon=True)
+                self.thread.start()
+
+    def prepare(self, record):
+
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+
+        if self.pid != os.getpid():
+            self.dispatch(record)
+            return
+        if self.queue is None:
+            self.start()
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except Exception:
+            self.dropped += 1
+            metrics.inc('log_dropped_total')
+
+    def drain(self):
+
+        while True:
+            record = self.queue.get()
+            try:
+                if record is None:
+                    return
+                if self.dropped:
+                    dropped, self.dropped = self.dropped, 0
+                    warning = logging.makeLogRecord({
+                        'name': record.name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                        'msg': '日志队列已满，丢弃了 %d 条日志', 'args': (dropped,),
+                    })
+                    self.dispatch(warning)
+                self.dispatch(record)
+            finally:
+                self.queue.task_done()
+
+    def dispatch(self, record):
+
+        for handler in self.targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def flush(self):
+
+        if self.queue is not None and self.pid == os.getpid() and self.thread.is_alive():
+            self.queue.join()
+        for handler in self.targets:
+            handler.flush()
+
+    def close(self):
+
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+            self.thread = None
+        for handler in self.targets:
+            handler.close()
+        super().close()
 
 
-    os.makedirs(LOG_DIR, exist_ok=True)
+def setup_logger(name=APP_NAME):
+    logger = logging.getLogger(name)
+    level = os.environ.get('BILIRAKU_LOG_LEVEL', 'INFO').upper()
+    logger.setLevel(level if level in ('DEBUG', 'INFO', 'WARNING', 'ERROR') else logging.INFO)
 
 
-    log_file = os.path.join(LOG_DIR, f'{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log')
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
+    file_handler = RotatingLogFileHandler()
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(JsonLogFormatter())
 
 
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 
 
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+    background_handler = BackgroundLogHandler(file_handler, console_handler)
+    background_handler.addFilter(LogContextFilter())
+    logger.addHandler(background_handler)
 
+    return logger
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+def flush_logs():
 
-    return logger
+    for handler in logger.handlers:
+        handler.flush()
+
+def prompt(text=''):
+
+    flush_logs()
+    return input(text)
 
 
 logger = setup_logger()
 
 
+class Metrics:
+    def __init__(self, window=2048):
+        self.window = window
+        self.timers = {}
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def observe(self, name, seconds, **labels):
+
+        key = self.key(name, labels)
+        with self.lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                timer = self.timers[key] = {'count': 0, 'sum': 0.0, 'samples': deque(maxlen=self.window)}
+            timer['count'] += 1
+            timer['sum'] += seconds
+            timer['samples'].append(seconds)
+
+    def inc(self, name, value=1, **labels):
+
+        with self.lock:
+            self.counters[self.key(name, labels)] += value
+
+    @contextmanager
+    def timer(self, name, **labels):
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+
+        with self.lock:
+            timers = {key: (t['count'], t['sum'], sorted(t['samples'])) for key, t in self.timers.items()}
+            counters = dict(self.counters)
+
+        result = {'timestamp': int(time.time()), 'timers': {}, 'counters': {}}
+        for (name, labels), (count, total, samples) in sorted(timers.items()):
+            result['timers'].setdefault(name, []).append({
+                'labels': dict(labels),
+                'count': count,
+                'sum': round(total, 6),
+                'p50': round(samples[int(0.5 * (len(samples) - 1))], 6),
+                'p90': round(samples[int(0.9 * (len(samples) - 1))], 6),
+                'p99': round(samples[int(0.99 * (len(samples) - 1))], 6),
+                'max': round(samples[-1], 6),
+            })
+        for (name, labels), value in sorted(counters.items()):
+            result['counters'].setdefault(name, []).append({'labels': dict(labels), 'value': value})
+
+        sources = {dict(labels).get('source'): value for (name, labels), value in counters.items() if name == 'answer_source_total'}
+        answered = sum(sources.values())
+        if answered:
+            result['answer_bank_hit_rate'] = round(sources.get('bank', 0) / answered, 4)
+            result['random_fallback_rate'] = round(sources.get('random', 0) / answered, 4)
+        return result
+
+    def render_prometheus(self):
+
+        snapshot = self.snapshot()
+        lines = []
+
+        def label_text(labels, extra=None):
+            items = list(labels.items()) + list((extra or {}).items())
+            if not items:
+                return ''
+            escaped = [f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in items]
+            return '{' + ','.join(escaped) + '}'
+
+        for name, series in snapshot['timers'].items():
+            metric = f'{APP_NAME}_{name}'
+            lines.append(f'# TYPE {metric} summary')
+            for item in series:
+                for q in ('p50', 'p90', 'p99'):
+                    quantile = {'p50': '0.5', 'p90': '0.9', 'p99': '0.99'}[q]
+                    lines.append(f"{metric}{label_text(item['labels'], {'quantile': quantile})} {item[q]}")
+                lines.append(f"{metric}_sum{label_text(item['labels'])} {item['sum']}")
+                lines.append(f"{metric}_count{label_text(item['labels'])} {item['count']}")
+        for name, series in snapshot['counters'].items():
+            metric = f'{APP_NAME}_{name}'
+            lines.append(f'# TYPE {metric} counter')
+            for item in series:
+                lines.append(f"{metric}{label_text(item['labels'])} {item['value']}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+
+        tmp_path = f'{path}.tmp'
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"保存性能指标失败: {str(e)}")
+
+
+metrics = Metrics()
 
-session = requests.Session()
-session.verify = False
-session.mount('http://', requests.adapters.HTTPAdapter(
-    max_retries=urllib3.util.retry.Retry(
-        total=3,
-        backoff_factor=1,
-        status_forcelist=[500, 502, 503, 504]
-    )
-))
-session.mount('https://', requests.adapters.HTTPAdapter(
-    max_retries=urllib3.util.retry.Retry(
-        total=3,
-        backoff_factor=1,
-        status_forcelist=[500, 502, 503, 504]
-    )
-))
+
+def instrument(name, **labels):
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                metrics.inc(f'{name}_errors_total', **labels)
+                raise
+            finally:
+                metrics.observe(f'{name}_seconds', time.perf_counter() - started, **labels)
+            if isinstance(result, dict):
+                metrics.inc(f'{name}_responses_total', code=result.get('code'), **labels)
+            elif result is None:
+                metrics.inc(f'{name}_failures_total', **labels)
+            return result
+        return wrapper
+    return decorator
+
+def start_metrics_server(port, host='127.0.0.1'):
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.startswith('/metrics.json'):
+                body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode('utf-8')
+                content_type = 'application/json; charset=utf-8'
+            elif self.path.startswith('/metrics'):
+                body = metrics.render_prometheus().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"性能指标接口已启动: http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+def start_metrics_dump(path, interval=60):
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            metrics.dump(path)
+
+    threading.Thread(target=loop, name='metrics-dump', daemon=True).start()
+    logger.info(f"性能指标将每 {interval} 秒写入: {path}")
+
+
+
+def new_session(pool_size=None):
+
+    import requests
+    import urllib3
+    from urllib3.util.retry import Retry
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    pool_size = pool_size or HTTP_POOL_SIZE
+    new = requests.Session()
+    new.verify = False
+    for prefix in ('http://', 'https://'):
+        new.mount(prefix, circuit_adapter_class()(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=HTTP_RETRY_TOTAL,
+                status=HTTP_STATUS_RETRIES,
+                backoff_factor=1,
+                status_forcelist=[500, 502, 503, 504],
+                respect_retry_after_header=False,
+                raise_on_status=False
+            )
+        ))
+    return new
+
+@functools.lru_cache(maxsize=None)
+def circuit_adapter_class():
+
+    import requests
+
+    class CircuitBreakerAdapter(requests.adapters.HTTPAdapter):
+
+        def send(self, request, **kwargs):
+            breaker = circuit_breakers.get(request.url)
+            breaker.before()
+            try:
+                response = super().send(request, **kwargs)
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_response(response)
+            return response
+
+    return CircuitBreakerAdapter
+
+
+class SessionRegistry:
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, url):
+
+        parts = urllib.parse.urlsplit(url)
+        key = f'{parts.scheme}://{parts.netloc}'
+        with self.lock:
+            if key not in self.sessions:
+                self.sessions[key] = new_session(self.pool_size)
+            return self.sessions[key]
+
+    def configure(self, pool_size=None):
+
+        with self.lock:
+            self.pool_size = pool_size
+            for http in self.sessions.values():
+                http.close()
+            self.sessions.clear()
+
+
+http_sessions = SessionRegistry()
+
+
+class RateLimiter:
+    def __init__(self, limits=None, directory=RATE_LIMIT_DIR):
+        self.limits = dict(DEFAULT_RATE_LIMITS)
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.group_locks = {}
+        self.files = {}
+        self.local = {}
+        self.pid = None
+        self.fcntl = None
+        self.shared = None
+        if limits:
+            self.configure(limits)
+
+    def configure(self, limits=None, directory=None):
+
+        with self.lock:
+            self.limits = dict(DEFAULT_RATE_LIMITS)
+            for group, limit in (limits or {}).items():
+                if isinstance(limit, dict):
+                    rate, burst = limit.get('rate', 0), limit.get('burst')
+                elif isinstance(limit, (list, tuple)):
+                    rate, burst = (list(limit) + [None])[:2]
+                else:
+                    rate, burst = limit, None
+                rate = float(rate or 0)
+                self.limits[group] = (rate, int(burst) if burst else max(1, int(rate)))
+            if directory is not None and directory != self.directory:
+                self.close_files()
+                self.directory = directory
+
+    def disable(self):
+
+        with self.lock:
+            self.limits = {group: (0.0, 1) for group in self.limits}
+
+    def close_files(self):
+
+        for fd in self.files.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.files = {}
+
+    def group_lock(self, group):
+
+        with self.lock:
+            if self.pid != os.getpid():
+                self.close_files()
+                self.group_locks = {}
+                self.pid = os.getpid()
+            if self.shared is None:
+                try:
+                    import fcntl
+                    self.fcntl = fcntl
+                    self.shared = True
+                except ImportError:
+                    self.shared = False
+                    logger.warning("当前平台不支持文件锁，限流只在本进程内生效")
+            return self.group_locks.setdefault(group, threading.Lock())
+
+    def state_file(self, group):
+
+        fd = self.files.get(group)
+        if fd is None:
+            os.makedirs(self.directory, exist_ok=True)
+            fd = os.open(os.path.join(self.directory, f'{group}.bucket'), os.O_RDWR | os.O_CREAT, 0o600)
+            self.files[group] = fd
+        return fd
+
+    def reserve(self, group, rate, burst):
+
+        with self.group_lock(group):
+            fd = self.state_file(group) if self.shared else None
+            if fd is not None:
+                self.fcntl.flock(fd, self.fcntl.LOCK_EX)
+            try:
+                raw = os.pread(fd, 16, 0) if fd is not None else self.local.get(group, b'')
+                now = time.time()
+                tokens, stamp = struct.unpack('dd', raw) if len(raw) == 16 else (float(burst), now)
+                tokens = min(float(burst), tokens + max(0.0, now - stamp) * rate) - 1
+                state = struct.pack('dd', tokens, now)
+                if fd is not None:
+                    os.pwrite(fd, state, 0)
+                else:
+                    self.local[group] = state
+            finally:
+                if fd is not None:
+                    self.fcntl.flock(fd, self.fcntl.LOCK_UN)
+        return max(0.0, -tokens / rate)
+
+    def acquire(self, group):
+
+        rate, burst = self.limits.get(group, (0.0, 1)) if group else (0.0, 1)
+        if rate <= 0:
+            return 0.0
+        try:
+            wait = self.reserve(group, rate, burst)
+        except OSError as e:
+            logger.debug("限流状态文件不可用(%s): %s", group, e)
+            return 0.0
+        if wait > 0:
+            metrics.inc('rate_limit_waits_total', group=group)
+            metrics.observe('rate_limit_wait_seconds', wait, group=group)
+            time.sleep(wait)
+        return wait
+
+
+rate_limiter = RateLimiter()
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host} 已熔断，{retry_in:.1f}秒后再试")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value):
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_delay(attempt, base=1.0, cap=10.0):
+
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    LOAD_STATUSES = (412, 429)
+
+    def __init__(self, host, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN,
+                 max_cooldown=CIRCUIT_MAX_COOLDOWN):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def transition(self, state):
+
+        if state != self.state:
+            self.state = state
+            metrics.inc('circuit_transitions_total', host=self.host, state=state)
+
+    def check(self):
+
+        with self.lock:
+            remaining = self.open_until - time.monotonic()
+            if self.state == self.OPEN and remaining > 0:
+                metrics.inc('circuit_rejected_total', host=self.host)
+                raise CircuitOpenError(self.host, remaining)
+
+    def before(self):
+
+        with self.lock:
+            if self.state == self.OPEN:
+                remaining = self.open_until - time.monotonic()
+                if remaining > 0:
+                    metrics.inc('circuit_rejected_total', host=self.host)
+                    raise CircuitOpenError(self.host, remaining)
+                self.transition(self.HALF_OPEN)
+                logger.info("%s 熔断冷却结束，发送探测请求", self.host)
+            if self.state == self.HALF_OPEN:
+                if self.probing:
+                    metrics.inc('circuit_rejected_total', host=self.host)
+                    raise CircuitOpenError(self.host, self.cooldown)
+                self.probing = True
+
+    def record_response(self, response):
+
+        status = response.status_code
+        if status in self.LOAD_STATUSES or status >= 500:
+            self.record_failure(parse_retry_after(response.headers.get('Retry-After')), status)
+        else:
+            self.record_success()
+
+    def record_success(self):
+
+        with self.lock:
+            self.probing = False
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self.trips = 0
+                self.transition(self.CLOSED)
+                logger.info("%s 已恢复，熔断关闭", self.host)
+
+    def record_failure(self, retry_after=None, status=None):
+
+        with self.lock:
+            self.probing = False
+            self.failures += 1
+            if self.state == self.HALF_OPEN or retry_after is not None or self.failures >= self.failure_threshold:
+                self.trip(retry_after, status)
+
+    def trip(self, retry_after, status):
+
+        self.trips += 1
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = min(self.max_cooldown, self.cooldown * 2 ** (self.trips - 1))
+        self.open_until = time.monotonic() + delay
+        self.failures = 0
+        self.transition(self.OPEN)
+        reason = f"状态码 {status}" if status else "连接失败"
+        if retry_after is not None:
+            logger.warning("%s 返回%s并要求 Retry-After，熔断 %.1f 秒", self.host, reason, delay)
+        else:
+            logger.warning("%s 请求连续失败(%s)，熔断 %.1f 秒", self.host, reason, delay)
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN,
+                 max_cooldown=CIRCUIT_MAX_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def get(self, url):
+
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(
+                    host,
+                    failure_threshold=self.failure_threshold,
+                    cooldown=self.cooldown,
+                    max_cooldown=self.max_cooldown
+                )
+            return self.breakers[host]
+
+    def configure(self, failure_threshold=None, cooldown=None, max_cooldown=None):
+
+        with self.lock:
+            self.failure_threshold = failure_threshold or self.failure_threshold
+            self.cooldown = cooldown or self.cooldown
+            self.max_cooldown = max_cooldown or self.max_cooldown
+            self.breakers.clear()
+
+    def states(self):
+
+        with self.lock:
+            return {host: breaker.state for host, breaker in self.breakers.items()}
+
+
+circuit_breakers = CircuitBreakerRegistry()
+
+
+def rate_limit_group(url):
+
+    path = urllib.parse.urlsplit(url).path
+    if path.startswith('/x/senior/'):
+        return 'senior'
+    if path.startswith('/x/passport-'):
+        return 'passport'
+    return None
+
+def throttle(url, group=None):
+
+    circuit_breakers.get(url).check()
+    return rate_limiter.acquire(group or rate_limit_group(url))
 
 
 appkey = API_CONFIG['appkey']
 appsec = API_CONFIG['appsec']
 headers = HEADERS.copy()
 
+def set_base_urls(api_base=None, passport_base=None):
+
+    global API_BASE_URL, PASSPORT_BASE_URL
+    if api_base:
+        API_BASE_URL = api_base.rstrip('/')
+    if passport_base:
+        PASSPORT_BASE_URL = passport_base.rstrip('/')
+    if api_base or passport_base:
+        logger.info(f"使用自定义接口地址: API={API_BASE_URL}, PASSPORT={PASSPORT_BASE_URL}")
+
 def appsign(params):
 
     try:
@@ -174,113 +996,213 @@ def appsign(params):
         logger.error(f'生成签名失败: {str(e)}')
         raise
 
-def get(url, params=None):
-    global headers, access_token, session
+class BiliAccount:
+    def __init__(self, access_token, csrf='', mid=None, cookie='', name=None, refresh_token=''):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.csrf = csrf or ''
+        self.mid = str(mid) if mid else ''
+        self.name = name or self.mid or 'default'
+        self.headers = HEADERS.copy()
+        if self.mid:
+            self.headers['x-bili-mid'] = self.mid
+        if cookie:
+            self.headers['cookie'] = cookie
+        self.session = new_session(http_sessions.pool_size)
+        self.quota_exhausted = False
+
+    @classmethod
+    def from_auth_data(cls, auth_data, name=None):
+
+        if not auth_data.get('access_token'):
+            raise ValueError('认证数据缺少access_token')
+        return cls(
+            access_token=auth_data['access_token'],
+            csrf=auth_data.get('csrf', ''),
+            mid=auth_data.get('mid') or auth_data.get('uid'),
+            cookie=auth_data.get('cookie', ''),
+            name=name,
+            refresh_token=auth_data.get('refresh_token', ''),
+        )
 
-    
-    current_headers = headers.copy()
-    if access_token:
+    @classmethod
+    def from_auth_file(cls, path):
+
+        with open(path, 'r', encoding='utf-8') as f:
+            auth_data = json.load(f)
+        if not auth_data.get('access_token'):
+            raise ValueError(f'认证文件缺少access_token: {path}')
+        return cls.from_auth_data(auth_data, name=Path(path).stem)
+
+
+def request_context(account=None):
+
+    if account is not None:
+        return account.access_token, account.csrf, account.headers, account.session
+    return access_token, csrf, headers, None
+
+def get(url, params=None, account=None):
+
+    token, _, base_headers, http = request_context(account)
+    http = http or http_sessions.get(url)
+    current_headers = base_headers.copy()
+    if token:
         current_headers.update({
-            'Authorization': f'Bearer {access_token}'
+            'Authorization': f'Bearer {token}'
         })
 
+    endpoint = urllib.parse.urlsplit(url).path
+    started = time.perf_counter()
     try:
-        logger.debug(f"GET请求: {url}")
+        logger.debug("GET请求: %s", url)
         if params:
-            logger.debug(f"参数: {params}")
+            logger.debug("参数: %s", params)
 
-        response = session.get(url, headers=current_headers, params=params, verify=False)
+        throttle(url)
+        response = http.get(url, headers=current_headers, params=params, timeout=REQUEST_TIMEOUT, verify=False)
         response.raise_for_status()
         
         response_json = response.json()
+        metrics.inc('http_responses_total', endpoint=endpoint, code=response_json.get('code') if isinstance(response_json, dict) else '')
         return response_json
+    except CircuitOpenError as e:
+        metrics.inc('http_responses_total', endpoint=endpoint, code='circuit_open')
+        logger.warning(f"GET请求跳过: {str(e)}")
+        return {'code': -1, 'message': str(e)}
     except Exception as e:
+        metrics.inc('http_responses_total', endpoint=endpoint, code='error')
         logger.error(f"GET请求失败: {str(e)}")
         return {'code': -1, 'message': str(e)}
+    finally:
+        metrics.observe('http_request_seconds', time.perf_counter() - started, method='GET', endpoint=endpoint)
 
 
-def post(url, data=None, json=None):
-    global headers, access_token, session
+def post(url, data=None, json=None, account=None):
 
-    
-    current_headers = headers.copy()
-    if access_token:
+    token, _, base_headers, http = request_context(account)
+    http = http or http_sessions.get(url)
+    current_headers = base_headers.copy()
+    if token:
         current_headers.update({
-            'Authorization': f'Bearer {access_token}'
+            'Authorization': f'Bearer {token}'
         })
 
+    endpoint = urllib.parse.urlsplit(url).path
+    started = time.perf_counter()
     try:
-        logger.debug(f"POST请求: {url}")
+        logger.debug("POST请求: %s", url)
         if data:
-            logger.debug(f"表单数据: {data}")
+            logger.debug("表单数据: %s", data)
         if json:
-            logger.debug(f"JSON数据: {json}")
+            logger.debug("JSON数据: %s", json)
 
-        response = session.post(url, headers=current_headers, data=data, json=json, verify=False)
+        throttle(url)
+        response = http.post(url, headers=current_headers, data=data, json=json, timeout=REQUEST_TIMEOUT, verify=False)
         response.raise_for_status()
         
         response_json = response.json()
+        metrics.inc('http_responses_total', endpoint=endpoint, code=response_json.get('code') if isinstance(response_json, dict) else '')
         return response_json
+    except CircuitOpenError as e:
+        metrics.inc('http_responses_total', endpoint=endpoint, code='circuit_open')
+        logger.warning(f"POST请求跳过: {str(e)}")
+        return {'code': -1, 'message': str(e)}
     except Exception as e:
+        metrics.inc('http_responses_total', endpoint=endpoint, code='error')
         logger.error(f"POST请求失败: {str(e)}")
         return {'code': -1, 'message': str(e)}
+    finally:
+        metrics.observe('http_request_seconds', time.perf_counter() - started, method='POST', endpoint=endpoint)
 
 
 def load_api_key():
 
-    if os.path.exists(DEEPSEEK_KEY_FILE):
-        try:
+    try:
+        store = secret_store()
+        if store is not None:
+            return (store.get_secret('deepseek_key') or {}).get('api_key', '')
+        if os.path.exists(DEEPSEEK_KEY_FILE):
             with open(DEEPSEEK_KEY_FILE, 'r') as f:
                 data = json.load(f)
                 return data.get('api_key', '')
-        except Exception as e:
-            logger.error(f'读取DeepSeek API密钥失败: {str(e)}')
+    except Exception as e:
+        logger.error(f'读取DeepSeek API密钥失败: {str(e)}')
     return ''
 
 def save_api_key(api_key):
 
     try:
-        with open(DEEPSEEK_KEY_FILE, 'w') as f:
-            json.dump({'api_key': api_key}, f)
+        store = secret_store()
+        if store is not None:
+            store.set_secret('deepseek_key', {'api_key': api_key})
+        else:
+            os.makedirs(USER_CONFIG_DIR, exist_ok=True)
+            with open(DEEPSEEK_KEY_FILE, 'w') as f:
+                json.dump({'api_key': api_key}, f)
         logger.info('DeepSeek API密钥已保存')
     except Exception as e:
         logger.error(f'保存DeepSeek API密钥失败: {str(e)}')
 
+def load_cloud_token():
+
+    try:
+        store = secret_store()
+        if store is not None:
+            return store.get_secret('jfbym_key') or {}
+        if os.path.exists(CLOUD_CONFIG_FILE):
+            with open(CLOUD_CONFIG_FILE, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        logger.error(f'读取云码API配置失败: {str(e)}')
+    return {}
+
+def save_cloud_token(token, captcha_type):
+
+    store = secret_store()
+    if store is None:
+        return False
+    try:
+        store.set_secret('jfbym_key', {'token': token, 'type': captcha_type})
+        return True
+    except Exception as e:
+        logger.error(f'保存云码API配置失败: {str(e)}')
+        return False
+
 def load_auth_data():
     
-    if os.path.exists(AUTH_FILE):
-        try:
-            file_mtime = os.path.getmtime(AUTH_FILE)
-            current_time = time.time()
-            if (current_time - file_mtime) > 7 * 24 * 3600:
-                logger.info('认证信息已过期（超过7天），需要重新登录')
-                return False
+    try:
+        auth_data = read_saved_auth()
+        if auth_data:
+            
+            if 'access_token' in auth_data:
+                auth_data, changed = ensure_auth_valid(auth_data)
+                if not auth_data:
+                    logger.info('认证信息已失效且无法刷新，需要重新登录')
+                    return False
+                if changed:
+                    save_auth_data(auth_data)
+
+                global access_token, csrf
+                access_token = auth_data['access_token']
                 
-            with open(AUTH_FILE, 'r') as f:
-                auth_data = json.load(f)
+                csrf = auth_data.get('csrf', '')
                 
-                if 'access_token' in auth_data:
-                    global access_token, csrf
-                    access_token = auth_data['access_token']
-                    
-                    csrf = auth_data.get('csrf', '')
-                    
-                    
-                    if 'mid' in auth_data:
-                        headers.update({
-                            'x-bili-mid': auth_data['mid'],
-                        })
-                    
+                
+                if 'mid' in auth_data:
+                    headers.update({
+                        'x-bili-mid': auth_data['mid'],
+                    })
+                
+                
+                if 'cookie' in auth_data and auth_data['cookie']:
+                    headers.update({
+                        'cookie': auth_data['cookie']
+                    })
                     
-                    if 'cookie' in auth_data and auth_data['cookie']:
-                        headers.update({
-                            'cookie': auth_data['cookie']
-                        })
-                        
-                    logger.info('已从缓存加载登录信息')
-                    return True
-        except Exception as e:
-            logger.error(f'读取认证信息失败: {str(e)}')
+                logger.info('已从缓存加载登录信息')
+                return True
+    except Exception as e:
+        logger.error(f'读取认证信息失败: {str(e)}')
     return False
 
 def check_auth():
@@ -323,8 +1245,7 @@ def save_auth_data(auth_data):
             logger.warning("认证数据缺少cookie，将使用空值")
                 
         
-        with open(AUTH_FILE, 'w') as f:
-            json.dump(auth_data, f, indent=4)
+        write_saved_auth(auth_data)
         logger.info('认证信息已保存到缓存')
         return True
     except Exception as e:
@@ -332,19 +1253,256 @@ def save_auth_data(auth_data):
         return False
 
 
-class DeepSeekAPI:
-    def __init__(self):
-        self.base_url = "https://api.deepseek.com/v1"
-        self.model = "deepseek-chat"
-        self.api_key = API_KEY_DEEPSEEK
+@contextmanager
+def file_lock(path):
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except ImportError:
+            pass
+        yield
+    finally:
+        os.close(fd)
+
+
+def normalize_text(text):
+
+    text = unicodedata.normalize('NFKC', str(text or ''))
+    return ''.join(text.split()).lower()
+
+def question_key(question, options):
+
+    option_texts = sorted(normalize_text(option) for option in options)
+    raw = '\x1f'.join([normalize_text(question)] + option_texts)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class AnswerBank:
+    COMPACT_EVERY = 500
+
+    def __init__(self, path=ANSWER_BANK_FILE):
+        self.path = path
+        root = os.path.splitext(path)[0]
+        self.journal_path = f'{root}.log'
+        self.lock_path = f'{root}.lock'
+        self.entries = {}
+        self.pending = []
+        self.journal_size = 0
+        self.version = 0
+        self.loaded = False
+        self.lock = threading.RLock()
+
+    def load(self):
+
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            if not os.path.exists(self.path) and not os.path.exists(self.journal_path):
+                return
+            try:
+                self.entries, self.journal_size = self.read_disk()
+                self.version += 1
+                logger.info(f'已加载本地题库，共 {len(self.entries)} 道题')
+            except Exception as e:
+                logger.error(f'读取本地题库失败: {str(e)}')
+                self.entries = {}
+
+    def read_disk(self):
+
+        entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        size = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self.apply(entries, **json.loads(line))
+                    except (ValueError, TypeError):
+                        continue
+                    size += 1
+        return entries, size
+
+    @staticmethod
+    def apply(entries, key, question, options, correct_text=None, wrong_text=None, source='submit', updated=None):
+
+        entry = entries.get(key) or {
+            'question': question,
+            'options': options,
+            'answer': None,
+            'source': None,
+            'wrong': [],
+        }
+        if correct_text and (entry.get('source') != 'submit' or source == 'submit'):
+            entry['answer'] = correct_text
+            entry['source'] = source
+            if source == 'submit':
+                entry['wrong'] = [text for text in entry['wrong'] if normalize_text(text) != normalize_text(correct_text)]
+        if wrong_text:
+            if wrong_text not in entry['wrong']:
+                entry['wrong'].append(wrong_text)
+            if entry.get('answer') and normalize_text(entry['answer']) == normalize_text(wrong_text):
+                entry['answer'] = None
+                entry['source'] = None
+        entry['updated'] = updated or int(time.time())
+        entries[key] = entry
+        return entry
+
+    def save(self):
+
+        with self.lock:
+            if not self.pending:
+                return
+            lines = ''.join(json.dumps(op, ensure_ascii=False) + '\n' for op in self.pending)
+            try:
+                with file_lock(self.lock_path):
+                    with open(self.journal_path, 'a', encoding='utf-8') as f:
+                        f.write(lines)
+                self.journal_size += len(self.pending)
+                self.pending = []
+            except Exception as e:
+                logger.error(f'保存本地题库失败: {str(e)}')
+                return
+            if self.journal_size >= self.COMPACT_EVERY:
+                self.compact()
+
+    def compact(self):
+
+        with self.lock:
+            try:
+                import tempfile
+                with file_lock(self.lock_path):
+                    entries, _ = self.read_disk()
+                    for op in self.pending:
+                        self.apply(entries, **op)
+                    directory = os.path.dirname(os.path.abspath(self.path))
+                    fd, tmp_path = tempfile.mkstemp(prefix='answer_bank.', suffix='.tmp', dir=directory)
+                    try:
+                        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                            json.dump(entries, f, ensure_ascii=False, indent=2)
+                        os.replace(tmp_path, self.path)
+                    except BaseException:
+                        os.remove(tmp_path)
+                        raise
+                    open(self.journal_path, 'w').close()
+                self.entries = entries
+                self.pending = []
+                self.journal_size = 0
+                self.version += 1
+            except Exception as e:
+                logger.error(f'保存本地题库失败: {str(e)}')
+
+    def lookup(self, question, answers):
+
+        self.load()
+        options = [ans.get('ans_text') for ans in answers]
+        with self.lock:
+            entry = self.entries.get(question_key(question, options))
+        if not entry or not entry.get('answer'):
+            return None
+        target = normalize_text(entry['answer'])
+        if target in {normalize_text(text) for text in entry.get('wrong', [])}:
+            return None
+        for i, option in enumerate(options, 1):
+            if normalize_text(option) == target:
+                return i
+        return None
+
+    def wrong_choices(self, question, answers):
+
+        self.load()
+        options = [ans.get('ans_text') for ans in answers]
+        with self.lock:
+            entry = self.entries.get(question_key(question, options)) or {}
+        wrong = {normalize_text(text) for text in entry.get('wrong', [])}
+        return {i for i, option in enumerate(options, 1) if normalize_text(option) in wrong}
+
+    def record(self, question, answers, correct_text=None, wrong_text=None, source='submit', save=True):
+
+        if not question or not answers or not (correct_text or wrong_text):
+            return
+        self.load()
+        options = [ans.get('ans_text') for ans in answers]
+        op = {
+            'key': question_key(question, options),
+            'question': question,
+            'options': options,
+            'correct_text': correct_text,
+            'wrong_text': wrong_text,
+            'source': source,
+            'updated': int(time.time()),
+        }
+        with self.lock:
+            self.apply(self.entries, **op)
+            self.version += 1
+            self.pending.append(op)
+            if save:
+                self.save()
+
+
+answer_bank = AnswerBank()
+
+
+def build_question_prompt(question, options):
+
+    return f"问题：{question}\n选项：{list(options)}"
+
+def parse_question_prompt(prompt):
+
+    import ast
+
+    match = re.fullmatch(r'问题：(.*)\n选项：(\[.*\])', str(prompt or '').strip(), re.S)
+    try:
+        options = ast.literal_eval(match.group(2)) if match else None
+    except (ValueError, SyntaxError):
+        options = None
+    if not isinstance(options, list) or not options:
+        raise ValueError("无法从提示词中解析题目和选项")
+    return match.group(1), [str(option) for option in options]
+
+
+class AnswerEngine:
+    name = 'base'
+
+    def ask(self, question: str, timeout: Optional[int] = 30) -> str:
+        raise NotImplementedError
+
+    def answer(self, question, options, timeout: Optional[int] = 30) -> str:
+        return self.ask(build_question_prompt(question, options), timeout=timeout)
+
+    def batch_engine(self):
+        return self if callable(getattr(self, 'ask_batch', None)) else None
+
+
+class OpenAICompatibleEngine(AnswerEngine):
+    rate_group = None
+    name = 'openai'
+    label = 'OpenAI兼容'
+
+    def __init__(self, base_url, model, api_key='', stream=None, max_tokens=None, temperature=None):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.api_key = api_key
+        self.stream = DEEPSEEK_STREAM if stream is None else stream
+        self.max_tokens = max_tokens or DEEPSEEK_MAX_TOKENS
+        self.temperature = temperature
 
     def ask(self, question: str, timeout: Optional[int] = 30) -> str:
+        import requests
+
         url = f"{self.base_url}/chat/completions"
         
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
         }
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
         
         data = {
             "model": self.model,
@@ -353,38 +1511,374 @@ class DeepSeekAPI:
                     "role": "user",
                     "content": PROMPT.format(time.time(), question)
                 }
-            ]
+            ],
+            "max_tokens": self.max_tokens
         }
+        if self.temperature is not None:
+            data["temperature"] = self.temperature
+        if self.stream:
+            data["stream"] = True
 
         try:
-            response = requests.post(
+            throttle(url, self.rate_group)
+            response = http_sessions.get(url).post(
                 url,
                 headers=headers,
                 json=data,
                 timeout=timeout,
+                stream=self.stream,
                 verify=False  
             )
             
 
             if response.status_code == 400:
-                logger.error(f"DeepSeek API错误 (400): {response.text}")
-                raise Exception("DeepSeek API返回400错误")
+                logger.error(f"{self.label} API错误 (400): {response.text}")
+                raise Exception(f"{self.label} API返回400错误")
             elif response.status_code != 200:
-                logger.error(f"DeepSeek API错误 ({response.status_code}): {response.text}")
-                raise Exception(f"DeepSeek API请求失败: HTTP {response.status_code}")
-                
+                logger.error(f"{self.label} API错误 ({response.status_code}): {response.text}")
+                raise Exception(f"{self.label} API请求失败: HTTP {response.status_code}")
+
+            if self.stream:
+                return self.read_stream(response)
             return response.json()["choices"][0]["message"]["content"]
         except requests.exceptions.RequestException as e:
-            logger.error(f"DeepSeek API网络请求失败: {str(e)}")
-            raise Exception(f"DeepSeek API请求失败: {str(e)}")
+            logger.error(f"{self.label} API网络请求失败: {str(e)}")
+            raise Exception(f"{self.label} API请求失败: {str(e)}")
         except (KeyError, IndexError) as e:
-            logger.error(f"DeepSeek API返回格式错误: {str(e)}")
-            raise Exception(f"DeepSeek API返回解析失败: {str(e)}")
+            logger.error(f"{self.label} API返回格式错误: {str(e)}")
+            raise Exception(f"{self.label} API返回解析失败: {str(e)}")
         except Exception as e:
-            logger.error(f"DeepSeek API未知错误: {str(e)}")
+            logger.error(f"{self.label} API未知错误: {str(e)}")
             raise 
 
+    def ask_batch(self, items, timeout: Optional[int] = 120):
+
+        url = f"{self.base_url}/chat/completions"
+        headers = {
+            "Content-Type": "application/json",
+        }
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        lines = [
+            json.dumps({'id': i, 'question': question, 'options': list(options)}, ensure_ascii=False)
+            for i, (question, options) in enumerate(items, 1)
+        ]
+        data = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": BATCH_PROMPT.format('\n'.join(lines))
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 32 + 16 * len(items)
+        }
+
+        throttle(url, self.rate_group)
+        response = http_sessions.get(url).post(url, headers=headers, json=data, timeout=timeout, verify=False)
+        if response.status_code != 200:
+            raise Exception(f"{self.label} API请求失败: HTTP {response.status_code}")
+
+        content = response.json()["choices"][0]["message"]["content"]
+        answers = {}
+        for item in json.loads(content).get('answers', []):
+            try:
+                index = int(item.get('id'))
+                choice = int(item.get('answer'))
+            except (TypeError, ValueError):
+                continue
+            if 1 <= index <= len(items) and 1 <= choice <= len(items[index-1][1]):
+                answers[index-1] = choice
+        return answers
+
+    def read_stream(self, response):
+
+        content = ''
+        try:
+            for line in response.iter_lines():
+                line = line.decode('utf-8', errors='ignore').strip()
+                if not line.startswith('data:'):
+                    continue
+                payload = line[5:].strip()
+                if payload == '[DONE]':
+                    break
+                choices = json.loads(payload).get('choices') or []
+                if not choices:
+                    continue
+                content += choices[0].get('delta', {}).get('content') or ''
+                match = ANSWER_PATTERN.search(content)
+                if match:
+                    return match.group(0)
+        finally:
+            response.close()
+        return content.strip()
+
+
+class DeepSeekAPI(OpenAICompatibleEngine):
+    name = 'deepseek'
+    label = 'DeepSeek'
+    rate_group = 'deepseek'
+
+    def __init__(self, stream=None, max_tokens=None, temperature=None):
+        super().__init__(
+            "https://api.deepseek.com/v1",
+            "deepseek-chat",
+            API_KEY_DEEPSEEK,
+            stream=stream,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+
+
+def bigrams(text):
+
+    text = normalize_text(text)
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i+2] for i in range(len(text) - 1)}
+
+def similarity(a, b):
+
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class RetrievalEngine(AnswerEngine):
+    name = 'retrieval'
+
+    def __init__(self, bank=None, threshold=0.6):
+        self.bank = bank or answer_bank
+        self.threshold = threshold
+        self.grams = {}
+        self.postings = {}
+        self.version = None
+        self.lock = threading.Lock()
+
+    def ask(self, question: str, timeout: Optional[int] = 30) -> str:
+        return self.answer(*parse_question_prompt(question), timeout=timeout)
+
+    def refresh(self):
+
+        self.bank.load()
+        with self.bank.lock:
+            if self.version == self.bank.version:
+                return
+            added = [(key, entry.get('question')) for key, entry in self.bank.entries.items() if key not in self.grams]
+            self.version = self.bank.version
+        for key, text in added:
+            grams = bigrams(text)
+            self.grams[key] = grams
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(key)
+
+    def answer(self, question, options, timeout: Optional[int] = 30) -> str:
+
+        question_grams = bigrams(question)
+        with self.lock:
+            self.refresh()
+            candidates = {key: self.grams[key] for gram in question_grams for key in self.postings.get(gram, ())}
+        best_entry = None
+        best_score = 0.0
+        with self.bank.lock:
+            entries = [(self.bank.entries.get(key), grams) for key, grams in candidates.items()]
+        for entry, grams in entries:
+            if not entry or not entry.get('answer'):
+                continue
+            score = similarity(question_grams, grams)
+            if score > best_score:
+                best_entry, best_score = entry, score
+
+        if best_entry and best_score >= self.threshold:
+            answer_grams = bigrams(best_entry['answer'])
+            scores = [similarity(answer_grams, bigrams(option)) for option in options]
+            logger.info(f"检索引擎匹配到相似题目 (相似度: {best_score:.2f})")
+        else:
+            scores = [similarity(question_grams, bigrams(option)) for option in options]
+
+        return str(max(range(len(options)), key=lambda i: scores[i]) + 1)
+
+
+def parse_choice(text, option_count):
+
+    match = ANSWER_PATTERN.search(str(text or ''))
+    if not match:
+        return None
+    choice = int(match.group(0))
+    return choice if 1 <= choice <= option_count else None
+
+
+class EnsembleEngine(AnswerEngine):
+    name = 'ensemble'
+
+    def __init__(self, engines, deadline=DEFAULT_ENSEMBLE_DEADLINE):
+        self.engines = engines
+        self.deadline = deadline
+        self.last_confidence = 0.0
+
+    def ask(self, question: str, timeout: Optional[int] = 30) -> str:
+        return self.answer(*parse_question_prompt(question), timeout=timeout)
+
+    def batch_engine(self):
+        return next((member for member in (engine.batch_engine() for engine in self.engines) if member), None)
+
+    def answer(self, question, options, timeout: Optional[int] = 30) -> str:
+
+        deadline = min(self.deadline, timeout or self.deadline)
+        executor = ThreadPoolExecutor(max_workers=len(self.engines), thread_name_prefix='ensemble')
+        futures = [submit_in_context(executor, engine.answer, question, options, timeout=deadline) for engine in self.engines]
+        votes = Counter()
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                try:
+                    choice = parse_choice(future.result(), len(options))
+                except Exception as e:
+                    logger.warning(f"集成引擎成员请求失败: {str(e)}")
+                    continue
+                if choice:
+                    votes[choice] += 1
+        except FutureTimeoutError:
+            logger.warning(f"集成引擎有 {sum(1 for f in futures if not f.done())} 个成员超过 {deadline}s 未返回，已忽略")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if not votes:
+            self.last_confidence = 0.0
+            return ''
+        choice, count = votes.most_common(1)[0]
+        self.last_confidence = count / len(self.engines)
+        logger.info(f"集成投票结果: {dict(votes)}，选择 {choice}，置信度 {self.last_confidence:.2f}")
+        return str(choice)
+
+
+class LatencyTracker:
+    def __init__(self, size=100):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+
+        with self.lock:
+            self.samples.append(seconds)
+
+    def quantile(self, q, default=None):
+
+        with self.lock:
+            samples = sorted(self.samples)
+        if len(samples) < 5:
+            return default
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+latency_trackers = {}
+
+
+class HedgedEngine(AnswerEngine):
+    name = 'hedged'
+
+    def __init__(self, engine, quantile=0.9, budget=20, default_delay=3.0, min_delay=0.5, max_hedges=1):
+        self.engine = engine
+        self.quantile = quantile
+        self.budget = budget
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_hedges = max_hedges
+        self.tracker = latency_trackers.setdefault(engine.name, LatencyTracker())
+
+    def ask(self, question: str, timeout: Optional[int] = 30) -> str:
+        return self.engine.ask(question, timeout=timeout)
+
+    def batch_engine(self):
+        return self.engine.batch_engine()
+
+    def hedge_delay(self):
+
+        delay = self.tracker.quantile(self.quantile, self.default_delay)
+        return max(self.min_delay, min(delay, self.budget / 2))
 
+    def timed_answer(self, question, options, timeout):
+
+        started = time.monotonic()
+        result = self.engine.answer(question, options, timeout=timeout)
+        self.tracker.add(time.monotonic() - started)
+        return result
+
+    def answer(self, question, options, timeout: Optional[int] = 30) -> str:
+
+        budget = min(self.budget, timeout or self.budget)
+        delay = self.hedge_delay()
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=1 + self.max_hedges, thread_name_prefix='hedge')
+        pending = {submit_in_context(executor, self.timed_answer, question, options, budget)}
+        launched = 1
+        last_error = None
+        try:
+            while pending:
+                remaining = budget - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                can_hedge = launched <= self.max_hedges
+                done, pending = wait(
+                    pending,
+                    timeout=min(delay, remaining) if can_hedge else remaining,
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        last_error = e
+                if can_hedge and (not done or not pending):
+                    logger.info(f"答题请求 {time.monotonic() - started:.1f}s 未返回，发送对冲请求 (阈值 {delay:.1f}s)")
+                    pending.add(submit_in_context(executor, self.timed_answer, question, options, budget))
+                    launched += 1
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if last_error is not None and not pending:
+            raise last_error
+        raise TimeoutError(f"答题请求超过单题总时限 {budget}s")
+
+
+def create_answer_engine(config=None):
+
+    config = ANSWER_ENGINE_CONFIG if config is None else config
+    if config.get('hedge_enabled'):
+        return HedgedEngine(
+            create_answer_engine(dict(config, hedge_enabled=False)),
+            quantile=config.get('hedge_quantile', 0.9),
+            budget=config.get('hedge_budget', 20)
+        )
+    engine = config.get('answer_engine', 'deepseek')
+    if engine == 'ensemble':
+        samples = max(1, int(config.get('ensemble_samples', DEFAULT_ENSEMBLE_SAMPLES)))
+        members = []
+        for spec in config.get('ensemble_engines') or [{'answer_engine': 'deepseek'}]:
+            member_config = dict(config)
+            member_config.update(spec)
+            if member_config.get('answer_engine') == 'ensemble':
+                continue
+            if samples > 1:
+                member_config.setdefault('engine_temperature', config.get('ensemble_temperature', 0.7))
+            members.extend(create_answer_engine(member_config) for _ in range(samples))
+        return EnsembleEngine(members, deadline=config.get('ensemble_deadline', DEFAULT_ENSEMBLE_DEADLINE))
+    if engine == 'openai':
+        return OpenAICompatibleEngine(
+            config.get('engine_base_url', 'http://127.0.0.1:8080/v1'),
+            config.get('engine_model', 'local'),
+            config.get('engine_api_key', ''),
+            temperature=config.get('engine_temperature')
+        )
+    if engine == 'retrieval':
+        return RetrievalEngine()
+    if engine != 'deepseek':
+        logger.warning(f"未知的答题引擎: {engine}，将使用DeepSeek")
+    return DeepSeekAPI(temperature=config.get('engine_temperature'))
+
+
+@instrument('captcha_download')
 def download_captcha_image(url):
 
     headers = {
@@ -400,25 +1894,26 @@ def download_captcha_image(url):
     for attempt in range(max_retries):
         try:
             
-            response = requests.get(url, headers=headers, timeout=10, verify=False)
+            throttle(url, 'captcha_image')
+            response = http_sessions.get(url).get(url, headers=headers, timeout=10, verify=False)
             if response.status_code == 200:
                 return response.content
             elif response.status_code == 412:
-
                 logger.warning(f"下载验证码被拒绝 (状态码: 412)，尝试重试 {attempt+1}/{max_retries}")
-
-                headers['User-Agent'] += f' {random.randint(1000, 9999)}'
-                time.sleep(random.uniform(1.0, 3.0))
             else:
                 logger.warning(f"下载验证码失败，状态码: {response.status_code}，尝试重试 {attempt+1}/{max_retries}")
-                time.sleep(1)
+        except CircuitOpenError as e:
+            logger.warning(f"跳过验证码下载: {str(e)}")
+            return None
         except Exception as e:
             logger.warning(f"下载验证码出错: {str(e)}，尝试重试 {attempt+1}/{max_retries}")
-            time.sleep(1)
+        if attempt < max_retries - 1:
+            time.sleep(retry_delay(attempt))
     
     logger.error("多次尝试下载验证码失败")
     return None
 
+@instrument('captcha_recognize', backend='jfbym')
 def recognize_with_jfbym(image_data):
 
     if not JFBYM_TOKEN:
@@ -430,7 +1925,7 @@ def recognize_with_jfbym(image_data):
         base64_data = base64.b64encode(image_data).decode('utf-8')
         
         
-        api_url = "http://api.jfbym.com/api/YmServer/customApi"
+        api_url = JFBYM_API_URL
         
         
         data = {
@@ -443,7 +1938,7 @@ def recognize_with_jfbym(image_data):
             "Content-Type": "application/json"
         }
         
-        logger.info(f"请求云码API，类型ID: {JFBYM_TYPE}")
+        logger.info("请求云码API，类型ID: %s", JFBYM_TYPE)
         
         max_retries = 3
         for attempt in range(max_retries):
@@ -453,10 +1948,11 @@ def recognize_with_jfbym(image_data):
                     "http": None,
                     "https": None
                 }
-                logger.info("已禁用代理设置，直接连接到云码API服务器")
+                logger.debug("已禁用代理设置，直接连接到云码API服务器")
                 
                 
-                response = requests.post(
+                throttle(api_url, 'jfbym')
+                response = http_sessions.get(api_url).post(
                     api_url, 
                     headers=headers, 
                     json=data, 
@@ -465,14 +1961,14 @@ def recognize_with_jfbym(image_data):
                     proxies=proxies  
                 )
                 
-                logger.info(f"云码API响应状态码: {response.status_code}")
+                logger.info("云码API响应状态码: %s", response.status_code)
                 
                 if response.status_code == 200:
                     
-                    logger.info(f"云码API完整响应: {response.text}")
+                    logger.debug("云码API完整响应: %s", response.text)
                     
                     result = response.json()
-                    logger.info(f"云码API响应JSON: {result}")
+                    logger.debug("云码API响应JSON: %s", result)
                     
                     
                     if result.get('code') == 10000:
@@ -481,28 +1977,30 @@ def recognize_with_jfbym(image_data):
                             isinstance(result['data'], dict) and 
                             'data' in result['data']):
                             captcha_text = result['data']['data']
-                            logger.info(f"云码识别成功：{captcha_text}")
+                            logger.info("云码识别成功：%s", captcha_text)
                             return captcha_text
                         else:
                             logger.warning("云码API返回成功，但未找到验证码结果")
                             logger.info("请检查API响应结构，验证码应位于data.data字段")
                     else:
                         error_msg = result.get('message', result.get('msg', '未知错误'))
-                        logger.warning(f"云码API返回错误: 代码={result.get('code')}, 信息={error_msg}")
+                        logger.warning("云码API返回错误: 代码=%s, 信息=%s", result.get('code'), error_msg)
                 else:
-                    logger.warning(f"云码API请求失败，状态码: {response.status_code}")
-                    logger.warning(f"响应内容: {response.text}")
+                    logger.warning("云码API请求失败，状态码: %s", response.status_code)
+                    logger.debug("响应内容: %s", response.text)
                 
                 if attempt < max_retries - 1:
-                    logger.info(f"尝试重试 ({attempt+1}/{max_retries})")
-                    time.sleep(random.uniform(1.0, 3.0))
+                    logger.info("尝试重试 (%s/%s)", attempt+1, max_retries)
+                    time.sleep(retry_delay(attempt))
             
+            except CircuitOpenError as e:
+                logger.warning("跳过云码API请求: %s", e)
+                return None
             except Exception as e:
-                logger.warning(f"云码API请求出错: {str(e)}")
-                import traceback
-                logger.debug(f"错误详情: {traceback.format_exc()}")
+                logger.warning("云码API请求出错: %s", e)
+                logger.debug("错误详情", exc_info=True)
                 if attempt < max_retries - 1:
-                    time.sleep(1)
+                    time.sleep(retry_delay(attempt))
         
         logger.error("多次尝试云码API识别验证码失败")
         return None
@@ -513,11 +2011,325 @@ def recognize_with_jfbym(image_data):
         logger.error(f"错误详情: {traceback.format_exc()}")
         return None
 
-def recognize_captcha(captcha_url, cloud_api=True):
+class LocalCaptchaRecognizer:
+    def __init__(self, model_path, charset_path=None, height=64):
+        self.model_path = model_path
+        self.charset_path = charset_path or f'{os.path.splitext(model_path)[0]}.charset.json'
+        self.height = height
+        self.session = None
+        self.charset = None
+        self.available = None
+        self.lock = threading.Lock()
+
+    def load(self):
+
+        with self.lock:
+            if self.available is not None:
+                return self.available
+            try:
+                import numpy
+                import onnxruntime
+                with open(self.charset_path, 'r', encoding='utf-8') as f:
+                    self.charset = json.load(f)
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = 1
+                self.session = onnxruntime.InferenceSession(
+                    self.model_path, options, providers=['CPUExecutionProvider']
+                )
+                self.numpy = numpy
+                self.available = True
+                logger.info(f"已加载本地验证码识别模型: {self.model_path}")
+            except ImportError as e:
+                logger.warning(f"本地验证码识别需要安装 onnxruntime 和 numpy: {str(e)}")
+                self.available = False
+            except Exception as e:
+                logger.error(f"加载本地验证码识别模型失败: {str(e)}")
+                self.available = False
+            return self.available
+
+    def recognize(self, image_data):
+
+        if not self.load():
+            return None
+        from PIL import Image
+
+        np = self.numpy
+        image = Image.open(BytesIO(image_data)).convert('L')
+        width = max(1, int(image.width * self.height / image.height))
+        image = image.resize((width, self.height), Image.LANCZOS)
+        pixels = np.asarray(image, dtype=np.float32) / 255.0
+        pixels = ((pixels - 0.5) / 0.5).reshape(1, 1, self.height, width)
+
+        inputs = {self.session.get_inputs()[0].name: pixels}
+        logits = np.asarray(self.session.run(None, inputs)[0])
+        if logits.ndim == 3 and logits.shape[1] == 1:
+            logits = logits[:, 0, :]
+        elif logits.ndim == 3:
+            logits = logits[0]
+        indices = logits.argmax(axis=-1) if logits.ndim == 2 else logits.reshape(-1)
+
+        text = []
+        previous = 0
+        for index in indices.tolist():
+            if index != previous and index != 0 and index < len(self.charset):
+                text.append(self.charset[index])
+            previous = index
+        return ''.join(text) or None
+
+
+local_recognizer = None
+
+@instrument('captcha_recognize', backend='local')
+def recognize_with_local(image_data):
+
+    global local_recognizer
+    if not LOCAL_CAPTCHA_MODEL:
+        logger.error("缺少本地验证码识别模型配置")
+        return None
+    if local_recognizer is None or local_recognizer.model_path != LOCAL_CAPTCHA_MODEL:
+        local_recognizer = LocalCaptchaRecognizer(LOCAL_CAPTCHA_MODEL, LOCAL_CAPTCHA_CHARSET or None)
+    try:
+        captcha_text = local_recognizer.recognize(image_data)
+        if captcha_text:
+            logger.info(f"本地模型识别成功：{captcha_text}")
+        return captcha_text
+    except Exception as e:
+        logger.error(f"本地模型识别验证码出错: {str(e)}")
+        return None
+
+def captcha_recognizers(backend=None):
+
+    backend = backend or CAPTCHA_BACKEND
+    recognizers = []
+    if backend in ('local', 'auto') and LOCAL_CAPTCHA_MODEL:
+        recognizers.append(('本地模型', recognize_with_local))
+    if backend in ('cloud', 'auto') and JFBYM_TOKEN:
+        recognizers.append(('云码API', recognize_with_jfbym))
+    return recognizers
+
+def auto_captcha_enabled():
+
+    if CAPTCHA_BACKEND == 'cloud':
+        return USE_CLOUD_CAPTCHA
+    return bool(captcha_recognizers())
+
+class CaptchaCache:
+    COMPACT_EVERY = 200
+
+    def __init__(self, directory=CAPTCHA_CACHE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'labels.json')
+        self.journal_path = os.path.join(directory, 'labels.log')
+        self.lock_path = os.path.join(directory, 'labels.lock')
+        self.entries = {}
+        self.journal_size = 0
+        self.loaded = False
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def key(image_data):
+        return hashlib.sha256(image_data).hexdigest()
+
+    @staticmethod
+    def extension(image_data):
+        if image_data.startswith(b'\xff\xd8'):
+            return '.jpg'
+        if image_data.startswith(b'GIF8'):
+            return '.gif'
+        return '.png'
+
+    def load(self):
+
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            if not os.path.exists(self.index_path) and not os.path.exists(self.journal_path):
+                return
+            try:
+                self.entries, self.journal_size = self.read_disk()
+                logger.info(f'已加载验证码缓存，共 {len(self.entries)} 张')
+            except Exception as e:
+                logger.error(f'读取验证码缓存失败: {str(e)}')
+                self.entries = {}
+
+    def read_disk(self):
+
+        entries = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        size = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[record['key']] = record['entry']
+                    size += 1
+        return entries, size
+
+    def append(self, key, entry):
+
+        line = json.dumps({'key': key, 'entry': entry}, ensure_ascii=False) + '\n'
+        try:
+            with file_lock(self.lock_path):
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            self.journal_size += 1
+        except Exception as e:
+            logger.error(f'保存验证码缓存失败: {str(e)}')
+            return
+        if self.journal_size >= self.COMPACT_EVERY:
+            self.save()
+
+    def save(self):
+
+        with self.lock:
+            try:
+                import tempfile
+                with file_lock(self.lock_path):
+                    entries, _ = self.read_disk()
+                    entries.update({key: entry for key, entry in self.entries.items() if key not in entries})
+                    fd, tmp_path = tempfile.mkstemp(prefix='labels.', suffix='.tmp', dir=self.directory)
+                    try:
+                        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                            json.dump(entries, f, ensure_ascii=False, indent=2)
+                        os.replace(tmp_path, self.index_path)
+                    except BaseException:
+                        os.remove(tmp_path)
+                        raise
+                    open(self.journal_path, 'w').close()
+                self.entries = entries
+                self.journal_size = 0
+            except Exception as e:
+                logger.error(f'保存验证码缓存失败: {str(e)}')
+
+    def lookup(self, image_data):
+
+        self.load()
+        with self.lock:
+            entry = self.entries.get(self.key(image_data))
+        if not entry or not entry.get('text') or entry.get('passed') is False:
+            return None
+        return entry['text']
+
+    def store(self, image_data, text=None, source=None):
+
+        self.load()
+        key = self.key(image_data)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                filename = f'{key}{self.extension(image_data)}'
+                try:
+                    os.makedirs(self.directory, exist_ok=True)
+                    with open(os.path.join(self.directory, filename), 'wb') as f:
+                        f.write(image_data)
+                except Exception as e:
+                    logger.error(f'保存验证码图片失败: {str(e)}')
+                    return key
+                entry = {'file': filename, 'text': None, 'source': None, 'passed': None, 'wrong': []}
+            if text and entry.get('passed') is not True:
+                entry['text'] = text
+                entry['source'] = source
+                entry['passed'] = None
+            entry['updated'] = int(time.time())
+            self.entries[key] = entry
+            self.append(key, entry)
+        return key
+
+    def mark(self, image_data, text, passed, source='submit'):
+
+        key = self.store(image_data)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            if passed:
+                entry['text'] = text
+                entry['passed'] = True
+                if entry.get('source') is None:
+                    entry['source'] = source
+            else:
+                if text and text not in entry['wrong']:
+                    entry['wrong'].append(text)
+                if entry.get('passed') is not True and entry.get('text') == text:
+                    entry['passed'] = False
+            entry['updated'] = int(time.time())
+            self.append(key, entry)
+
+    def labeled(self):
+
+        self.load()
+        with self.lock:
+            entries = list(self.entries.values())
+        return [
+            (os.path.join(self.directory, entry['file']), entry['text'])
+            for entry in entries if entry.get('passed') is True and entry.get('text')
+        ]
+
+
+captcha_cache = CaptchaCache()
+
+def race_captcha_recognizers(image_data, recognizers):
+
+    executor = ThreadPoolExecutor(max_workers=len(recognizers), thread_name_prefix='captcha-race')
+    futures = {submit_in_context(executor, recognizer, image_data): (name, recognizer) for name, recognizer in recognizers}
+    try:
+        for future in as_completed(futures):
+            name, recognizer = futures[future]
+            try:
+                captcha_text = future.result()
+            except Exception as e:
+                logger.warning(f"{name}识别出错: {str(e)}")
+                continue
+            if captcha_text:
+                logger.info(f"{name}率先识别成功: {captcha_text}")
+                return captcha_text, recognizer.__name__
+            logger.warning(f"{name}识别失败")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return None, None
+
+def recognize_captcha_image(image_data, race=None):
+
+    cached = captcha_cache.lookup(image_data)
+    if cached:
+        metrics.inc('captcha_cache_total', result='hit')
+        logger.info(f"验证码缓存命中: {cached}")
+        return cached
+    metrics.inc('captcha_cache_total', result='miss')
+
+    recognizers = captcha_recognizers()
+    if (CAPTCHA_RACE if race is None else race) and len(recognizers) > 1:
+        captcha_text, source = race_captcha_recognizers(image_data, recognizers)
+        captcha_cache.store(image_data, captcha_text, source=source)
+        return captcha_text
+
+    for name, recognizer in recognizers:
+        logger.info(f"使用{name}识别验证码...")
+        captcha_text = recognizer(image_data)
+        if captcha_text:
+            logger.info(f"验证码识别成功: {captcha_text}")
+            captcha_cache.store(image_data, captcha_text, source=recognizer.__name__)
+            return captcha_text
+        logger.warning(f"{name}识别失败")
+
+    captcha_cache.store(image_data)
+    return None
+
+def recognize_captcha(captcha_url, cloud_api=True, open_browser=True):
+
+    import webbrowser
 
     try:
 
         if not cloud_api:
+            if not open_browser:
+                return None
             logger.info("将在浏览器中打开验证码以供手动输入")
             webbrowser.open(captcha_url)
             return None
@@ -527,44 +2339,120 @@ def recognize_captcha(captcha_url, cloud_api=True):
         image_data = download_captcha_image(captcha_url)
         
         if not image_data:
-            logger.warning("无法下载验证码图片，将在浏览器中打开")
-            webbrowser.open(captcha_url)
+            logger.warning("无法下载验证码图片")
+            if open_browser:
+                webbrowser.open(captcha_url)
             return None
         
 
-        logger.info("使用云码API识别验证码...")
-        captcha_text = recognize_with_jfbym(image_data)
-        
+        captcha_text = recognize_captcha_image(image_data)
         if captcha_text:
-            logger.info(f"验证码识别成功: {captcha_text}")
             return captcha_text
-        
 
-        logger.warning("云API识别失败，将在浏览器中打开验证码")
-        webbrowser.open(captcha_url)
+        logger.warning("自动识别验证码失败")
+        if open_browser:
+            webbrowser.open(captcha_url)
         return None
         
     except Exception as e:
         logger.error(f"验证码识别过程出错: {str(e)}")
 
         try:
-            webbrowser.open(captcha_url)
+            if open_browser:
+                webbrowser.open(captcha_url)
         except:
             logger.error("无法打开浏览器，请手动复制链接查看验证码")
         return None
 
 
-def category_get():
-    
+
+class AsyncHTTPClient:
+    def __init__(self, host_limit=HOST_CONNECTION_LIMIT, timeout=REQUEST_TIMEOUT):
+        self.host_limit = host_limit
+        self.timeout = timeout
+        self.semaphores = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    def semaphore(self, url):
+
+        import asyncio
+
+        host = urllib.parse.urlsplit(url).netloc
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            hosts = self.semaphores.get(loop)
+            if hosts is None:
+                for closed in [other for other in self.semaphores.keys() if other.is_closed()]:
+                    del self.semaphores[closed]
+                hosts = self.semaphores[loop] = {}
+            if host not in hosts:
+                hosts[host] = asyncio.Semaphore(self.host_limit)
+            return hosts[host]
+
+    @staticmethod
+    def release(semaphore, task):
+
+        semaphore.release()
+        if not task.cancelled():
+            task.exception()
+
+    async def call(self, url, func, *args, budget=None, **kwargs):
+
+        import asyncio
+
+        semaphore = self.semaphore(url)
+        await semaphore.acquire()
+        try:
+            task = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+        task.add_done_callback(functools.partial(self.release, semaphore))
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=budget or self.timeout * 2)
+        except asyncio.TimeoutError as e:
+            raise TimeoutError(str(e)) from e
+
+
+async_client = AsyncHTTPClient()
+
+
+async def async_qrcode_get():
+
+    url = f'{PASSPORT_BASE_URL}/x/passport-tv-login/qrcode/auth_code'
+    try:
+        return await async_client.call(url, qrcode_get)
+    except TimeoutError:
+        logger.error("获取二维码超时")
+        return {'code': -1, 'message': '请求超时', 'data': {}}
+
+async def async_qrcode_poll(auth_code):
+
+    url = f'{PASSPORT_BASE_URL}/x/passport-tv-login/qrcode/poll'
+    try:
+        return await async_client.call(url, qrcode_poll, auth_code)
+    except TimeoutError:
+        logger.error("轮询二维码状态超时")
+        return {'code': -1, 'message': '请求超时', 'data': {}}
+
+def run_sync(coro):
+
+    import asyncio
+
+    return asyncio.run(coro)
+
+def category_get(account=None):
+
+    token, csrf_token, _, _ = request_context(account)
     try:
         
-        if not access_token:
+        if not token:
             logger.error("获取分类时发现未登录，请先完成登录")
             return None
             
         params = {
-            'access_key': access_token,
-            'csrf': csrf,
+            'access_key': token,
+            'csrf': csrf_token,
             'disable_rcmd': 0,
             'mobi_app': 'android',
             'platform': 'android',
@@ -572,11 +2460,13 @@ def category_get():
             'web_location': '333.790'
         }
         
-        res = get('https://api.bilibili.com/x/senior/v1/category', params)
+        res = get(f'{API_BASE_URL}/x/senior/v1/category', params, account=account)
         
         if res and res.get('code') == 0:
             return res.get('data')
         elif res and res.get('code') == 41099:
+            if account is not None:
+                account.quota_exhausted = True
             logger.error(f'获取分类失败，可能是已经达到答题限制(B站每日限制3次)，请前往B站APP确认是否可以正常答题: {res}')
             return None
         elif res and res.get('code') == -101:
@@ -589,17 +2479,18 @@ def category_get():
         logger.error(f"获取分类出错: {str(e)}")
         return None
 
-def captcha_get():
-    
+def captcha_get(account=None):
+
+    token, csrf_token, _, _ = request_context(account)
     try:
         
-        if not access_token:
+        if not token:
             logger.error("获取验证码时发现未登录，请先完成登录")
             return None
     
         params = {
-            'access_key': access_token,
-            'csrf': csrf,
+            'access_key': token,
+            'csrf': csrf_token,
             'disable_rcmd': 0,
             'mobi_app': 'android',
             'platform': 'android',
@@ -607,7 +2498,7 @@ def captcha_get():
             'web_location': '333.790'
         }
         
-        res = get('https://api.bilibili.com/x/senior/v1/captcha', params)
+        res = get(f'{API_BASE_URL}/x/senior/v1/captcha', params, account=account)
         
         if res and res.get('code') == 0:
             return res.get('data')
@@ -619,18 +2510,19 @@ def captcha_get():
         logger.error(f"获取验证码出错: {str(e)}")
         return None
 
-def captcha_submit(code, captcha_token, ids):
-    
+def captcha_submit(code, captcha_token, ids, account=None):
+
+    token, csrf_token, _, _ = request_context(account)
     try:
-        if not access_token:
+        if not token:
             logger.error("提交验证码时发现未登录，请先完成登录")
-            return False
+            return None
             
         params = {
-            "access_key": access_token,
+            "access_key": token,
             "bili_code": code,
             "bili_token": captcha_token,
-            "csrf": csrf,
+            "csrf": csrf_token,
             "disable_rcmd": "0",
             "gt_challenge": "",
             "gt_seccode": "",
@@ -642,36 +2534,38 @@ def captcha_submit(code, captcha_token, ids):
             "type": "bilibili",
         }
         
-        res = post('https://api.bilibili.com/x/senior/v1/captcha/submit', params)
+        res = post(f'{API_BASE_URL}/x/senior/v1/captcha/submit', params, account=account)
         
         if res and res.get('code') == 0:
             logger.info("验证码提交成功")
-            return True
+            return 0
         else:
             error_msg = res.get('message', '未知错误') if res else '请求失败'
             logger.error(f"提交验证码失败: {error_msg}")
-            return False
+            return res.get('code') if res else None
     except Exception as e:
         logger.error(f"提交验证码出错: {str(e)}")
-        return False
+        return None
 
-def question_get():
-    
-    return get('https://api.bilibili.com/x/senior/v1/question', {
-        "access_key": access_token,
-        "csrf": csrf,
+def question_get(account=None):
+
+    token, csrf_token, _, _ = request_context(account)
+    return get(f'{API_BASE_URL}/x/senior/v1/question', {
+        "access_key": token,
+        "csrf": csrf_token,
         "disable_rcmd": "0",
         "mobi_app": "android",
         "platform": "android",
         "statistics": "{\"appId\":1,\"platform\":3,\"version\":\"8.40.0\",\"abtest\":\"\"}",
         "web_location": "333.790",
-    })
+    }, account=account)
 
-def question_submit(id, ans_hash, ans_text):
-    
-    return post('https://api.bilibili.com/x/senior/v1/answer/submit', {
-        "access_key": access_token,
-        "csrf": csrf,
+def question_submit(id, ans_hash, ans_text, account=None):
+
+    token, csrf_token, _, _ = request_context(account)
+    return post(f'{API_BASE_URL}/x/senior/v1/answer/submit', {
+        "access_key": token,
+        "csrf": csrf_token,
         "id": id,
         "ans_hash": ans_hash,
         "ans_text": ans_text,
@@ -680,19 +2574,20 @@ def question_submit(id, ans_hash, ans_text):
         "platform": "android",
         "statistics": "{\"appId\":1,\"platform\":3,\"version\":\"8.40.0\",\"abtest\":\"\"}",
         "web_location": "333.790",
-    })
+    }, account=account)
 
-def question_result():
-    
-    res = get('https://api.bilibili.com/x/senior/v1/answer/result', {
-        "access_key": access_token,
-        "csrf": csrf,
+def question_result(account=None):
+
+    token, csrf_token, _, _ = request_context(account)
+    res = get(f'{API_BASE_URL}/x/senior/v1/answer/result', {
+        "access_key": token,
+        "csrf": csrf_token,
         "disable_rcmd": "0",
         "mobi_app": "android",
         "platform": "android",
         "statistics": "{\"appId\":1,\"platform\":3,\"version\":\"8.40.0\",\"abtest\":\"\"}",
         "web_location": "333.790",
-    })
+    }, account=account)
     if res and res.get('code') == 0:
         return res.get('data')
     else:
@@ -713,8 +2608,11 @@ def getTicket():
         fallback_hash = hashlib.md5(f"bilibili{ts}".encode()).hexdigest()
         return f"{fallback_hash},{ts}"
 
+@instrument('qrcode_get')
 def qrcode_get():
     
+    import requests
+
     logger.debug("调用qrcode_get获取登录二维码")
     try:
         
@@ -725,7 +2623,7 @@ def qrcode_get():
         
         
         signed_params = appsign(params.copy())
-        logger.debug(f"请求参数(已签名): {signed_params}")
+        logger.debug("请求参数(已签名): %s", signed_params)
         
         
         custom_headers = {
@@ -735,10 +2633,11 @@ def qrcode_get():
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
         }
         
-        url = 'https://passport.bilibili.com/x/passport-tv-login/qrcode/auth_code'
+        url = f'{PASSPORT_BASE_URL}/x/passport-tv-login/qrcode/auth_code'
         
         
-        response = requests.post(
+        throttle(url)
+        response = http_sessions.get(url).post(
             url=url,
             data=signed_params,
             headers=custom_headers,
@@ -746,7 +2645,7 @@ def qrcode_get():
             verify=False
         )
         
-        logger.debug(f"二维码API请求状态码: {response.status_code}")
+        logger.debug("二维码API请求状态码: %s", response.status_code)
         
         
         if response.status_code != 200:
@@ -757,7 +2656,7 @@ def qrcode_get():
         
         try:
             json_resp = response.json()
-            logger.debug(f"二维码获取返回: {json_resp}")
+            logger.debug("二维码获取返回: %s", json_resp)
             
             
             if json_resp.get('code') != 0:
@@ -784,9 +2683,12 @@ def qrcode_get():
         logger.error(f"异常详情: {traceback.format_exc()}")
         return {'code': -1, 'message': str(e), 'data': {}}
 
+@instrument('qrcode_poll')
 def qrcode_poll(auth_code):
     
-    logger.debug(f"调用qrcode_poll检查二维码状态 auth_code={auth_code}")
+    import requests
+
+    logger.debug("调用qrcode_poll检查二维码状态 auth_code=%s", auth_code)
     
     try:
         
@@ -798,7 +2700,7 @@ def qrcode_poll(auth_code):
         
         
         signed_params = appsign(params.copy())
-        logger.debug(f"轮询请求参数(已签名): {signed_params}")
+        logger.debug("轮询请求参数(已签名): %s", signed_params)
         
         
         custom_headers = {
@@ -808,10 +2710,11 @@ def qrcode_poll(auth_code):
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
         }
         
-        url = 'https://passport.bilibili.com/x/passport-tv-login/qrcode/poll'
+        url = f'{PASSPORT_BASE_URL}/x/passport-tv-login/qrcode/poll'
         
         
-        response = requests.post(
+        throttle(url)
+        response = http_sessions.get(url).post(
             url=url,
             data=signed_params,
             headers=custom_headers,
@@ -819,9 +2722,9 @@ def qrcode_poll(auth_code):
             verify=False
         )
         
-        logger.debug(f"二维码轮询状态码: {response.status_code}")
-        logger.debug(f"请求URL: {url}")
-        logger.debug(f"请求参数: {signed_params}")
+        logger.debug("二维码轮询状态码: %s", response.status_code)
+        logger.debug("请求URL: %s", url)
+        logger.debug("请求参数: %s", signed_params)
         
         
         if response.status_code != 200:
@@ -832,10 +2735,10 @@ def qrcode_poll(auth_code):
         
         try:
             
-            logger.debug(f"原始响应: {response.text}")
+            logger.debug("原始响应: %s", response.text)
             
             json_resp = response.json()
-            logger.debug(f"二维码状态轮询返回: {json_resp}")
+            logger.debug("二维码状态轮询返回: %s", json_resp)
             
             
             return json_resp
@@ -856,51 +2759,396 @@ def qrcode_poll(auth_code):
         logger.error(f"异常详情: {traceback.format_exc()}")
         return {'code': -1, 'message': str(e), 'data': {}}
 
-def save_qrcode_image(url):
-    
-    try:
-        
-        if not url:
-            logger.error("无法生成二维码: URL为空")
-            return None
-            
-        
-        try:
-            qr_img = qrcode_make(url)
-        except Exception as e:
-            logger.error(f"生成二维码图像失败: {str(e)}")
-            return None
+def render_qrcode_png(url):
 
-        
-        temp_dir = Path(tempfile.gettempdir()) / APP_NAME
-        os.makedirs(temp_dir, exist_ok=True)
+    from qrcode import make as qrcode_make
 
-        
-        qr_path = temp_dir / "bili_qrcode.png"
-        try:
-            qr_img.save(qr_path)
-            logger.info(f"二维码图片已保存到: {qr_path}")
-        except Exception as e:
-            logger.error(f"保存二维码图片失败: {str(e)}")
-            return None
+    buffer = BytesIO()
+    qrcode_make(url).save(buffer)
+    return buffer.getvalue()
 
-        
+def render_qrcode_ascii(url):
+
+    from io import StringIO
+    from qrcode.main import QRCode
+    from qrcode.constants import ERROR_CORRECT_L
+
+    qr = QRCode(error_correction=ERROR_CORRECT_L, border=1)
+    qr.add_data(url)
+    qr.make(fit=True)
+    out = StringIO()
+    qr.print_ascii(out=out, invert=True)
+    return out.getvalue()
+
+def auth_data_from_poll(poll_data):
+
+    cookies = {
+        item.get('name'): item.get('value')
+        for item in (poll_data.get('cookie_info') or {}).get('cookies', [])
+    }
+    expires_in = poll_data.get('expires_in')
+    return {
+        'access_token': poll_data.get('access_token'),
+        'refresh_token': poll_data.get('refresh_token', ''),
+        'mid': str(poll_data.get('mid') or cookies.get('DedeUserID') or ''),
+        'cookie': '; '.join(f'{name}={value}' for name, value in cookies.items()),
+        'csrf': cookies.get('bili_jct', ''),
+        'uid': str(poll_data.get('mid') or ''),
+        'timestamp': int(time.time()),
+        'expires_at': int(time.time()) + int(expires_in) if expires_in else None,
+    }
+
+def write_auth_file(path, auth_data):
+
+    tmp_path = f'{path}.tmp'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(auth_data, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+@instrument('oauth2_info')
+def oauth2_info(token, account=None):
+
+    url = f'{PASSPORT_BASE_URL}/x/passport-login/oauth2/info'
+    return get(url, params=appsign({'access_key': token}), account=account)
+
+@instrument('oauth2_refresh')
+def oauth2_refresh(token, refresh_token, account=None):
+
+    url = f'{PASSPORT_BASE_URL}/x/passport-login/oauth2/refresh_token'
+    return post(url, data=appsign({'access_key': token, 'refresh_token': refresh_token}), account=account)
+
+def refresh_auth_data(auth_data, account=None):
+
+    if not auth_data.get('refresh_token'):
+        logger.warning("认证信息中没有refresh_token，无法刷新")
+        return None
+    response = oauth2_refresh(auth_data['access_token'], auth_data['refresh_token'], account=account)
+    data = response.get('data') or {}
+    token_info = data.get('token_info') or {}
+    if response.get('code') != 0 or not token_info.get('access_token'):
+        logger.error(f"刷新access_token失败: {response.get('message', '未知错误')}")
+        return None
+
+    refreshed = auth_data_from_poll({**token_info, 'cookie_info': data.get('cookie_info')})
+    for key in ('mid', 'uid', 'cookie', 'csrf'):
+        if not refreshed.get(key):
+            refreshed[key] = auth_data.get(key, '')
+    logger.info(f"access_token已刷新，新的有效期至 {datetime.fromtimestamp(refreshed['expires_at']) if refreshed.get('expires_at') else '未知'}")
+    return refreshed
+
+def ensure_auth_valid(auth_data, account=None, margin=TOKEN_REFRESH_MARGIN):
+
+    now = int(time.time())
+    response = oauth2_info(auth_data['access_token'], account=account)
+    code = response.get('code')
+
+    if code == 0:
+        expires_in = (response.get('data') or {}).get('expires_in')
+        changed = False
+        if expires_in:
+            expires_at = now + int(expires_in)
+            changed = abs(expires_at - (auth_data.get('expires_at') or 0)) > 60
+            auth_data = {**auth_data, 'expires_at': expires_at}
+            if expires_in > margin:
+                return auth_data, changed
+            logger.info(f"access_token将在 {expires_in // 3600} 小时后过期，尝试刷新")
+        else:
+            return auth_data, changed
+        refreshed = refresh_auth_data(auth_data, account=account)
+        return (refreshed, True) if refreshed else (auth_data, changed)
+
+    if code == -1:
+        expires_at = auth_data.get('expires_at')
+        if not expires_at or expires_at > now:
+            logger.warning("无法验证登录状态，继续使用本地缓存的认证信息")
+            return auth_data, False
+
+    logger.info(f"access_token已失效 (code={code})，尝试刷新")
+    refreshed = refresh_auth_data(auth_data, account=account)
+    return (refreshed, True) if refreshed else (None, False)
+
+
+class QRLoginManager:
+    WAITING_CODES = (86101, 86039)
+    SCANNED_CODE = 86090
+    EXPIRED_CODE = 86038
+
+    def __init__(self, timeout=180, max_refreshes=2, poll_interval=2.0, max_interval=5.0,
+                 on_qrcode=None, on_status=None, on_complete=None):
+        self.timeout = timeout
+        self.max_refreshes = max_refreshes
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.on_qrcode = on_qrcode
+        self.on_status = on_status
+        self.on_complete = on_complete
+
+    @staticmethod
+    def emit(callback, *args):
+
+        if not callback:
+            return
         try:
-            if platform.system() == "Darwin":  
-                os.system(f"open {qr_path}")
-            elif platform.system() == "Windows":
-                os.system(f"start {qr_path}")
-            elif platform.system() == "Linux":
-                os.system(f"xdg-open {qr_path}")
-            logger.info("已自动打开二维码图片")
+            callback(*args)
         except Exception as e:
-            logger.info(f"无法自动打开图片，请手动查看保存的二维码图片: {qr_path}")
-            
-        return str(qr_path)
-    except Exception as e:
-        logger.error(f"保存二维码图片过程中出错: {str(e)}")
+            logger.error(f"登录回调出错: {str(e)}")
+
+    def next_interval(self, code, interval):
+
+        if code == self.SCANNED_CODE:
+            return 1.0
+        if code in self.WAITING_CODES:
+            return min(interval * 1.5, self.max_interval)
+        return min(interval * 2, self.max_interval * 2)
+
+    async def fetch_qrcode(self):
+
+        import asyncio
+
+        for attempt in range(1, 4):
+            qr_response = await async_qrcode_get()
+            qr_data = qr_response.get('data') or {}
+            if qr_response.get('code') == 0 and qr_data.get('url') and qr_data.get('auth_code'):
+                return qr_data
+            logger.warning(f"获取二维码失败，{attempt}/3次重试")
+            await asyncio.sleep(attempt)
         return None
 
+    async def login(self, name='default'):
+
+        import asyncio
+
+        refreshes = 0
+        while refreshes <= self.max_refreshes:
+            qr_data = await self.fetch_qrcode()
+            if not qr_data:
+                logger.error(f"[{name}] 无法获取登录二维码，请检查网络连接")
+                break
+            auth_code = qr_data['auth_code']
+            self.emit(self.on_qrcode, name, qr_data['url'], auth_code)
+
+            deadline = time.monotonic() + self.timeout
+            interval = self.poll_interval
+            last_code = None
+            while time.monotonic() < deadline:
+                await asyncio.sleep(interval)
+                poll_response = await async_qrcode_poll(auth_code)
+                code = poll_response.get('code', -1)
+                poll_data = poll_response.get('data') or {}
+                metrics.inc('qrcode_poll_total', code=code)
+
+                if poll_data.get('access_token'):
+                    auth_data = auth_data_from_poll(poll_data)
+                    logger.info(f"[{name}] 扫码登录成功")
+                    self.emit(self.on_complete, name, auth_data)
+                    return auth_data
+
+                if code != last_code:
+                    logger.info(f"[{name}] 扫码状态变化: code={code}, message={poll_response.get('message', '未知状态')}")
+                    self.emit(self.on_status, name, code)
+                    last_code = code
+
+                if code == self.EXPIRED_CODE:
+                    refreshes += 1
+                    if refreshes <= self.max_refreshes:
+                        logger.info(f"[{name}] 二维码已失效，自动刷新 ({refreshes}/{self.max_refreshes})")
+                    break
+                if code == 0:
+                    logger.warning(f"[{name}] 收到成功状态码，但未找到access_token: {poll_response}")
+                elif code not in self.WAITING_CODES and code != self.SCANNED_CODE:
+                    logger.warning(f"[{name}] 未知状态码: {code}, 消息: {poll_response.get('message')}")
+                interval = self.next_interval(code, interval)
+            else:
+                refreshes += 1
+                if refreshes > self.max_refreshes:
+                    logger.error(f"[{name}] 二维码扫描超时，请重试")
+                    break
+                logger.info(f"[{name}] 二维码等待超时，自动刷新 ({refreshes}/{self.max_refreshes})")
+
+        self.emit(self.on_complete, name, None)
+        return None
+
+    async def login_many(self, names):
+
+        import asyncio
+
+        return await asyncio.gather(*(self.login(name) for name in names))
+
+    def run(self, names):
+
+        return run_sync(self.login_many(names))
+
+
+QR_STATUS_TEXT = {
+    86101: '等待扫码',
+    86039: '等待扫码',
+    86090: '已扫码，请在手机上确认',
+    86038: '二维码已失效，正在刷新',
+}
+
+QR_BOARD_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>BiliRaku 扫码登录</title>
+<style>
+body { font-family: sans-serif; margin: 24px; background: #f4f5f7; }
+h1 { font-size: 20px; }
+#summary { margin-bottom: 16px; color: #555; }
+#board { display: flex; flex-wrap: wrap; gap: 16px; }
+.card { background: #fff; border-radius: 8px; padding: 12px; width: 220px; text-align: center; box-shadow: 0 1px 3px rgba(0,0,0,.1); }
+.card img { width: 196px; height: 196px; image-rendering: pixelated; }
+.card.done { opacity: .5; }
+.status { margin-top: 8px; font-size: 14px; }
+.done .status { color: #1a7f37; }
+.failed .status { color: #cf222e; }
+</style>
+</head>
+<body>
+<h1>BiliRaku 扫码登录</h1>
+<div id="summary"></div>
+<div id="board"></div>
+<script>
+const cards = {};
+async function refresh() {
+  const response = await fetch('/status.json', {cache: 'no-store'});
+  const data = await response.json();
+  document.getElementById('summary').textContent = `已登录 ${data.completed} / ${data.total}`;
+  for (const item of data.logins) {
+    let card = cards[item.name];
+    if (!card) {
+      card = document.createElement('div');
+      card.innerHTML = '<div class="name"></div><img alt="二维码"><div class="status"></div>';
+      document.getElementById('board').appendChild(card);
+      cards[item.name] = card;
+    }
+    card.className = 'card ' + item.state;
+    card.querySelector('.name').textContent = item.name;
+    card.querySelector('.status').textContent = item.status;
+    const img = card.querySelector('img');
+    const src = item.auth_code ? `/qrcode/${encodeURIComponent(item.name)}.png?v=${item.auth_code}` : '';
+    if (item.state === 'pending' && src && img.dataset.src !== src) {
+      img.src = src;
+      img.dataset.src = src;
+    }
+    img.style.visibility = item.state === 'pending' ? 'visible' : 'hidden';
+  }
+}
+refresh();
+setInterval(refresh, 1000);
+</script>
+</body>
+</html>
+"""
+
+
+class QRLoginBoard:
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.logins = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.server.server_address[1]}/' if self.server else None
+
+    def on_qrcode(self, name, url, auth_code):
+
+        png = render_qrcode_png(url)
+        with self.lock:
+            self.logins[name] = {
+                'name': name,
+                'auth_code': auth_code,
+                'png': png,
+                'state': 'pending',
+                'status': '等待扫码',
+            }
+
+    def on_status(self, name, code):
+
+        with self.lock:
+            login = self.logins.get(name)
+            if login is not None and login['state'] == 'pending':
+                login['status'] = QR_STATUS_TEXT.get(code, f'状态码 {code}')
+
+    def on_complete(self, name, auth_data):
+
+        with self.lock:
+            login = self.logins.setdefault(name, {'name': name, 'auth_code': None, 'png': None})
+            login['state'] = 'done' if auth_data else 'failed'
+            login['status'] = f"登录成功 (UID: {auth_data.get('mid')})" if auth_data else '登录失败或超时'
+            login['png'] = None
+
+    def snapshot(self):
+
+        with self.lock:
+            logins = [
+                {key: value for key, value in login.items() if key != 'png'}
+                for login in self.logins.values()
+            ]
+        return {
+            'total': len(logins),
+            'completed': sum(1 for login in logins if login['state'] == 'done'),
+            'logins': logins,
+        }
+
+    def qrcode_png(self, name):
+
+        with self.lock:
+            login = self.logins.get(name)
+            return login.get('png') if login else None
+
+    def start(self):
+
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        board = self
+
+        class BoardHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send_body(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = urllib.parse.urlsplit(self.path).path
+                if path == '/':
+                    self.send_body(QR_BOARD_PAGE.encode('utf-8'), 'text/html; charset=utf-8')
+                elif path == '/status.json':
+                    body = json.dumps(board.snapshot(), ensure_ascii=False).encode('utf-8')
+                    self.send_body(body, 'application/json; charset=utf-8')
+                elif path.startswith('/qrcode/') and path.endswith('.png'):
+                    png = board.qrcode_png(urllib.parse.unquote(path[len('/qrcode/'):-len('.png')]))
+                    if png is None:
+                        self.send_error(404)
+                    else:
+                        self.send_body(png, 'image/png')
+                else:
+                    self.send_error(404)
+
+        self.server = ThreadingHTTPServer((self.host, self.port), BoardHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='qrcode-board', daemon=True).start()
+        logger.info(f"扫码登录面板已启动: {self.url}")
+        return self
+
+    def stop(self):
+
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
 
 def auth():
     
@@ -915,131 +3163,127 @@ def auth():
 
     
     logger.info("开始B站TV端登录流程...")
-    retry_count = 0
-    qr_data = None
-    
-    
-    while retry_count < 3:
-        qr_response = qrcode_get()
-        
-        if qr_response.get('code') == 0:
-            qr_data = qr_response.get('data', {})
-            if qr_data and qr_data.get('url') and qr_data.get('auth_code'):
-                break
-        
-        retry_count += 1
-        logger.warning(f"获取二维码失败，{retry_count}/3次重试")
-        time.sleep(1)
-    
-    
-    if not qr_data or not qr_data.get('url') or not qr_data.get('auth_code'):
-        logger.error("无法获取登录二维码，请检查网络连接")
-        return False
-    
-    
-    auth_code = qr_data.get('auth_code')
-    qr_url = qr_data.get('url')
-    logger.info(f"获取二维码成功，请扫描二维码登录")
-    logger.info(f"二维码URL: {qr_url}")
-    logger.info(f"认证码: {auth_code}")
-    save_qrcode_image(qr_url)
-    
-    
-    logger.info("等待扫码...")
-    polling_count = 0
-    max_polling = 90  
-    
-    
-    last_code = None
-    
-    while polling_count < max_polling:
-        polling_count += 1
-        logger.info(f"轮询次数: {polling_count}/{max_polling}")
-        
-        
+    board = None
+
+    def show_qrcode(name, url, auth_code):
+        nonlocal board
+        logger.info("获取二维码成功，请扫描二维码登录")
+        logger.info(f"二维码URL: {url}")
+        logger.info(f"认证码: {auth_code}")
         try:
-            poll_response = qrcode_poll(auth_code)
-            
-            
-            import json
-            logger.debug(f"原始响应: {json.dumps(poll_response, ensure_ascii=False)}")
-            
-            
-            response_code = poll_response.get('code', -1)
-            response_message = poll_response.get('message', '未知状态')
-            poll_data = poll_response.get('data', {})
-            
-            
-            if response_code != last_code:
-                logger.info(f"扫码状态变化: code={response_code}, message={response_message}")
-                last_code = response_code
-            
-            
-            if poll_data and 'access_token' in poll_data:
-                access_token = poll_data.get('access_token')
-                refresh_token = poll_data.get('refresh_token', '')
-                logger.info(f"发现access_token: {access_token[:10]}...")
-                
-                
-                auth_data = {
-                    'access_token': access_token,
-                    'refresh_token': refresh_token,
-                    'cookie': '',  
-                    'csrf': '',    
-                    'uid': '',     
-                    'timestamp': int(time.time())
-                }
-                save_auth_data(auth_data)
-                
-                logger.info("成功获取到access_token，立即返回True")
-                return True
-                
-            
-            if response_code == 0:
-                logger.info("收到成功状态码，但未找到access_token，检查响应内容...")
-                logger.info(f"完整响应内容: {poll_response}")
-                
-                
-                for key, value in poll_data.items():
-                    logger.info(f"数据字段: {key} = {value}")
-                
-                
-                logger.warning("API可能已变更，请查看日志并报告问题")
-                
-            
-            elif response_code == 86038:
-                logger.error("二维码已失效，请重新获取")
-                return False
-            elif response_code == 86039:
-                
-                pass  
-            elif response_code == 86090:
-                
-                pass  
-            elif response_code == 86101:
-                
-                pass  
+            print(render_qrcode_ascii(url))
+        except Exception as e:
+            logger.debug("终端二维码渲染失败: %s", e)
+        try:
+            if board is None:
+                import webbrowser
+
+                board = QRLoginBoard()
+                board.on_qrcode(name, url, auth_code)
+                board.start()
+                if webbrowser.open(board.url):
+                    logger.info("已在浏览器中打开二维码页面")
+                else:
+                    logger.info(f"无法自动打开浏览器，请手动访问: {board.url}")
             else:
-                
-                logger.warning(f"未知状态码: {response_code}, 消息: {response_message}")
-                
+                board.on_qrcode(name, url, auth_code)
+        except Exception as e:
+            logger.info(f"无法显示二维码图片，请扫描终端中的二维码: {str(e)}")
+        logger.info("等待扫码...")
+
+    def show_status(name, code):
+        if board is not None:
+            board.on_status(name, code)
+
+    try:
+        auth_data = run_sync(QRLoginManager(on_qrcode=show_qrcode, on_status=show_status).login())
+    finally:
+        if board is not None:
+            board.stop()
+    if not auth_data:
+        return False
+
+    access_token = auth_data['access_token']
+    csrf = auth_data.get('csrf', '')
+    if auth_data.get('mid'):
+        headers.update({'x-bili-mid': auth_data['mid']})
+    if auth_data.get('cookie'):
+        headers.update({'cookie': auth_data['cookie']})
+    save_auth_data(auth_data)
+    logger.info(f"成功获取到access_token: {access_token[:10]}...")
+    return True
+
+def onboard_accounts(count, auth_dir=None, timeout=180, board_port=None):
+
+    if auth_dir:
+        os.makedirs(auth_dir, exist_ok=True)
+        logger.warning(f"认证信息将以明文同时导出到: {auth_dir}")
+    else:
+        try:
+            account_store.open()
         except Exception as e:
-            import traceback
-            logger.error(f"轮询过程发生错误: {str(e)}")
-            logger.error(f"错误详情: {traceback.format_exc()}")
-        
-        
-        if response_code in [86039, 86090]:  
-            time.sleep(1)  
-        else:
-            time.sleep(2)  
-    
-    logger.error("二维码扫描超时，请重试")
-    return False
+            logger.error(f"加密账号库不可用，请安装 cryptography 或用 --auth-dir 指定明文导出目录: {str(e)}")
+            return []
+    saved = []
+    board = None
+    if board_port is not None:
+        import webbrowser
+
+        board = QRLoginBoard(port=board_port).start()
+        webbrowser.open(board.url)
+
+    def show_qrcode(name, url, auth_code):
+        if board is not None:
+            board.on_qrcode(name, url, auth_code)
+            return
+        try:
+            logger.info(f"[{name}] 请扫描二维码登录 (链接: {url})\n{render_qrcode_ascii(url)}")
+        except Exception as e:
+            logger.info(f"[{name}] 请扫描二维码登录，链接: {url} ({str(e)})")
+
+    def show_status(name, code):
+        if board is not None:
+            board.on_status(name, code)
+
+    def save_account(name, auth_data):
+        if board is not None:
+            board.on_complete(name, auth_data)
+        if not auth_data:
+            return
+        account_name = f"account_{auth_data.get('mid') or name}"
+        if auth_dir:
+            path = os.path.join(auth_dir, f'{account_name}.json')
+            write_auth_file(path, auth_data)
+            saved.append(path)
+            logger.info(f"[{name}] 认证信息已导出到: {path}")
+        try:
+            account_store.upsert(auth_data, name=account_name)
+            logger.info(f"[{name}] 认证信息已保存到加密账号库")
+            if not auth_dir:
+                saved.append(account_name)
+        except Exception as e:
+            logger.warning(f"[{name}] 未能写入账号库: {str(e)}")
+
+    started = time.monotonic()
+    manager = QRLoginManager(timeout=timeout, on_qrcode=show_qrcode, on_status=show_status, on_complete=save_account)
+    try:
+        manager.run([f'login{i}' for i in range(1, count + 1)])
+    finally:
+        if board is not None:
+            board.stop()
+    logger.info(f"扫码登录完成 {len(saved)}/{count} 个账号，耗时 {time.monotonic() - started:.1f}s")
+    return saved
 
 
 class QuizSession:
-    def __init__(self):
+    def __init__(self, account=None, interactive=True, engine=None, pipeline=False):
+        self.account = account
+        self.interactive = interactive
+        self.engine = engine or create_answer_engine()
+        self.pipeline = pipeline
+        self.bookkeeping = None
+        self.final_result = None
+        self.verification_attempts = 0
         self.question_id = None
         self.answers = None
         self.question_num = 0
@@ -1048,6 +3292,17 @@ class QuizSession:
         self.answered_questions = 0
 
     def start(self):
+
+        if self.pipeline:
+            self.bookkeeping = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quiz-bookkeeping')
+        try:
+            self.run_questions()
+        finally:
+            if self.bookkeeping is not None:
+                self.bookkeeping.shutdown(wait=True)
+                self.bookkeeping = None
+
+    def run_questions(self):
     
         try:
             logger.info("开始答题流程，请耐心等待完成所有题目...")
@@ -1067,29 +3322,7 @@ class QuizSession:
                 
 
                 self.display_question()
-                
-                try:
-                    llm = DeepSeekAPI()
-                    answer = llm.ask(self.get_question_prompt())
-                    logger.info('AI给出的答案:{}'.format(answer))
-                    
-                    try:
-                        answer = int(answer)
-                        if not (1 <= answer <= len(self.answers)):
-                            logger.warning(f"无效的答案序号: {answer}")
-                            logger.warning("DeepSeek返回了无效答案，随机选择一个答案并继续...")
-                            answer = random.randint(1, len(self.answers))
-                            logger.info(f"随机选择了答案: {answer}")
-                    except ValueError:
-                        logger.warning("AI回复了无关内容:[{}],正在重试".format(answer))
-                        logger.warning("DeepSeek回复了无关内容，随机选择一个答案并继续...")
-                        answer = random.randint(1, len(self.answers))
-                        logger.info(f"随机选择了答案: {answer}")
-                except Exception as e:
-                    logger.error(f"AI请求出错: {str(e)}")
-                    logger.warning("DeepSeek请求失败，随机选择一个答案并继续...")
-                    answer = random.randint(1, len(self.answers))
-                    logger.info(f"随机选择了答案: {answer}")
+                answer = self.choose_answer()
 
                 result = self.answers[answer-1]
                 submit_result = self.submit_answer(result)
@@ -1114,10 +3347,55 @@ class QuizSession:
             logger.info(f"本次共回答了 {self.answered_questions} 道题目")
             self.print_result()
 
+    def choose_answer(self):
+
+        cached = answer_bank.lookup(self.question, self.answers)
+        if cached:
+            logger.info(f'题库命中，使用已知答案:{cached}')
+            metrics.inc('answer_source_total', source='bank')
+            return cached
+
+        try:
+            options = [ans['ans_text'] for ans in self.answers]
+            try:
+                with metrics.timer('answer_seconds', engine=self.engine.name):
+                    answer = self.engine.answer(self.question, options)
+            except Exception:
+                metrics.inc('answer_errors_total', engine=self.engine.name)
+                raise
+            logger.info('AI给出的答案:{}'.format(answer))
+
+            try:
+                answer = int(answer)
+                if not (1 <= answer <= len(self.answers)):
+                    logger.warning(f"无效的答案序号: {answer}")
+                    logger.warning("AI返回了无效答案，随机选择一个答案并继续...")
+                    answer = self.random_answer()
+                else:
+                    metrics.inc('answer_source_total', source='engine')
+            except ValueError:
+                logger.warning("AI回复了无关内容:[{}],正在重试".format(answer))
+                logger.warning("AI回复了无关内容，随机选择一个答案并继续...")
+                answer = self.random_answer()
+        except Exception as e:
+            logger.error(f"AI请求出错: {str(e)}")
+            logger.warning("AI请求失败，随机选择一个答案并继续...")
+            answer = self.random_answer()
+        return answer
+
+    def random_answer(self):
+
+        wrong = answer_bank.wrong_choices(self.question, self.answers)
+        choices = [i for i in range(1, len(self.answers) + 1) if i not in wrong]
+        answer = random.choice(choices or list(range(1, len(self.answers) + 1)))
+        metrics.inc('answer_source_total', source='random')
+        logger.info(f"随机选择了答案: {answer}")
+        return answer
+
     def get_question(self):
     
         try:
-            question = question_get()
+            question = question_get(account=self.account)
             if not question:
                 return False
 
@@ -1136,38 +3414,74 @@ class QuizSession:
             logger.error(f"获取题目失败: {str(e)}")
             return False
 
+    def prefetch_captcha(self):
+
+        logger.info("获取验证码...")
+        captcha_res = captcha_get(account=self.account)
+        if not captcha_res or not auto_captcha_enabled():
+            return captcha_res, None, None
+
+        captcha_url = captcha_res.get('url')
+        logger.info("正在自动识别验证码...")
+        image_data = download_captcha_image(captcha_url)
+        if not image_data:
+            logger.warning("无法下载验证码图片")
+            return captcha_res, None, None
+        if self.account is not None and self.account.quota_exhausted:
+            return captcha_res, image_data, None
+        try:
+            return captcha_res, image_data, recognize_captcha_image(image_data)
+        except Exception as e:
+            logger.error(f"自动识别验证码出错: {str(e)}")
+            return captcha_res, image_data, None
+
     def handle_verification(self):
+        import webbrowser
+
         try:
             logger.info("获取分类信息...")
-            category = category_get()
-            
-            
-            if not category:
-                logger.warning("无法自动获取分类，将使用默认分类或手动选择")
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quiz-captcha')
+            try:
+                captcha_future = submit_in_context(executor, self.prefetch_captcha)
+                category = category_get(account=self.account)
                 
                 
-                if AUTO_SELECT_CATEGORY:
-                    ids = AUTO_CATEGORY_ID
-                    logger.info(f"使用配置的默认分类: 文史类 (ID: {ids})")
-                else:
-                    logger.info("请选择分类:")
-                    logger.info("[1] 文史类 (ID: 6) - 推荐")
-                    logger.info("[2] 理工类 (ID: 8)")
-                    logger.info("[3] 艺术类 (ID: 7)")
-                    logger.info("[4] 财经类 (ID: 9)")
+                if self.account is not None and self.account.quota_exhausted:
+                    logger.error("该账号今日答题次数已用完，跳过验证")
+                    return False
+
+                if not category:
+                    logger.warning("无法自动获取分类，将使用默认分类或手动选择")
                     
                     
-                    category_choice = input('请选择分类 [默认1]: ').strip() or '1'
-                    category_map = {'1': '6', '2': '8', '3': '7', '4': '9'}
-                    ids = category_map.get(category_choice, '6')
-                    logger.info(f"已选择: ID {ids}")
-            else:
-                
-                ids = AUTO_CATEGORY_ID if AUTO_SELECT_CATEGORY else '6'
-                logger.info(f"已自动选择: 文史类 (ID: {ids})")
-            
-            logger.info("获取验证码...")
-            captcha_res = captcha_get()
+                    if AUTO_SELECT_CATEGORY or not self.interactive:
+                        ids = AUTO_CATEGORY_ID
+                        logger.info(f"使用配置的默认分类: 文史类 (ID: {ids})")
+                    else:
+                        logger.info("请选择分类:")
+                        logger.info("[1] 文史类 (ID: 6) - 推荐")
+                        logger.info("[2] 理工类 (ID: 8)")
+                        logger.info("[3] 艺术类 (ID: 7)")
+                        logger.info("[4] 财经类 (ID: 9)")
+                        
+                        
+                        category_choice = prompt('请选择分类 [默认1]: ').strip() or '1'
+                        category_map = {'1': '6', '2': '8', '3': '7', '4': '9'}
+                        ids = category_map.get(category_choice, '6')
+                        logger.info(f"已选择: ID {ids}")
+                else:
+                    
+                    ids = AUTO_CATEGORY_ID if AUTO_SELECT_CATEGORY else '6'
+                    logger.info(f"已自动选择: 文史类 (ID: {ids})")
+
+                try:
+                    captcha_res, image_data, captcha = captcha_future.result()
+                except Exception as e:
+                    logger.error(f"自动识别验证码出错: {str(e)}")
+                    captcha_res, image_data, captcha = None, None, None
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
             if not captcha_res:
                 logger.error("获取验证码失败，请确认登录状态")
                 return False
@@ -1175,24 +3489,18 @@ class QuizSession:
             captcha_url = captcha_res.get('url')
             logger.info(f"验证码链接: {captcha_url}")
             
-            captcha = None
-            
-            if USE_CLOUD_CAPTCHA:
-                try:
-                    logger.info("正在使用云码API自动识别验证码...")
-                    captcha = recognize_captcha(captcha_url, cloud_api=True)
-                    
-                    if captcha:
-                        logger.info(f"云码识别成功，将自动使用结果: {captcha}")
-                except Exception as e:
-                    logger.error(f"自动识别验证码出错: {str(e)}")
-                    captcha = None
+            if captcha:
+                logger.info(f"验证码识别成功，将自动使用结果: {captcha}")
             
+            if not captcha and not self.interactive:
+                logger.error("无人值守模式下验证码识别失败")
+                return self.retry_verification()
+
             if not captcha:
                 if not webbrowser.open(captcha_url):
                     logger.warning("无法自动打开浏览器，请手动复制链接查看验证码")
                 logger.info(f"请查看浏览器中的验证码并输入 (链接: {captcha_url})")
-                captcha = input('请输入验证码: ')
+                captcha = prompt('请输入验证码: ')
             
             logger.info(f"正在提交验证码: {captcha}, 分类ID: {ids}")
             
@@ -1203,34 +3511,36 @@ class QuizSession:
                 try:
                     
                     captcha_token = captcha_res.get('token')
-                    if captcha_submit(code=captcha, captcha_token=captcha_token, ids=ids):
+                    result_code = captcha_submit(code=captcha, captcha_token=captcha_token, ids=ids, account=self.account)
+                    if result_code == 0:
                         logger.info("验证通过✅")
+                        if image_data:
+                            captcha_cache.mark(image_data, captcha, True)
                         return self.get_question()
                     else:
+                        if image_data and result_code == CAPTCHA_WRONG_CODE:
+                            captcha_cache.mark(image_data, captcha, False)
+                        if not self.interactive:
+                            logger.warning("验证码未通过，重新获取验证码")
+                            return self.retry_verification()
                         retry_count += 1
                         if retry_count >= max_retries:
                             logger.error("验证失败")
-                            retry_choice = input('是否重试? [1]是 [2]否: ')
-                            if retry_choice == '1':
-                                return self.handle_verification()
-                            return False
+                            return self.retry_verification()
                         else:
                             logger.warning(f"验证失败，正在重试 ({retry_count}/{max_retries})...")
-                            if retry_count == 2:
+                            if retry_count == 2 and self.interactive:
                                 logger.info("多次重试失败，尝试手动输入验证码...")
                                 if not webbrowser.open(captcha_url):
                                     logger.warning("无法自动打开浏览器，请手动复制链接查看验证码")
                                 logger.info(f"请查看浏览器中的验证码并输入 (链接: {captcha_url})")
-                                captcha = input('请输入验证码: ')
+                                captcha = prompt('请输入验证码: ')
                             time.sleep(2)
                 except Exception as e:
                     retry_count += 1
                     logger.error(f"提交验证码失败: {str(e)}")
                     if retry_count >= max_retries:
-                        retry_choice = input('是否重试? [1]是 [2]否: ')
-                        if retry_choice == '1':
-                            return self.handle_verification()
-                        return False
+                        return self.retry_verification()
                     else:
                         logger.warning(f"验证码提交出错: {str(e)}，正在重试 ({retry_count}/{max_retries})...")
                         time.sleep(2)
@@ -1240,17 +3550,31 @@ class QuizSession:
             logger.error(f"处理验证码验证时出错: {str(e)}")
             return False
 
+    def retry_verification(self):
+
+        if not self.interactive:
+            self.verification_attempts += 1
+            if self.verification_attempts < 3:
+                logger.warning(f"重新获取验证码 ({self.verification_attempts}/3)")
+                return self.handle_verification()
+            return False
+
+        retry_choice = prompt('是否重试? [1]是 [2]否: ')
+        if retry_choice == '1':
+            return self.handle_verification()
+        return False
+
     def display_question(self):
     
-        logger.info(f"正在作答第 {self.question_num} 题")
-        logger.info(f"题目: {self.question}")
+        logger.info("正在作答第 %s 题", self.question_num)
+        logger.info("题目: %s", self.question)
         for i, answer in enumerate(self.answers, 1):
-            logger.info(f"选项{i}: {answer['ans_text']}")
+            logger.info("选项%s: %s", i, answer['ans_text'])
 
     def get_question_prompt(self):
     
         options = [f"{ans['ans_text']}" for ans in self.answers]
-        return f"问题：{self.question}\n选项：{options}"
+        return build_question_prompt(self.question, options)
 
     def submit_answer(self, answer):
     
@@ -1262,9 +3586,16 @@ class QuizSession:
             ans_hash = answer.get('ans_hash')
             ans_text = answer.get('ans_text')
             
-            logger.info(f"正在提交答案: {ans_text} (hash: {ans_hash})")
-            result = question_submit(self.question_id, ans_hash, ans_text)
-            
+            logger.info("正在提交答案: %s (hash: %s)", ans_text, ans_hash)
+            result = question_submit(self.question_id, ans_hash, ans_text, account=self.account)
+            return self.handle_submit_result(result, self.question, self.answers, ans_text)
+        except Exception as e:
+            logger.error(f"提交答案时出错: {str(e)}")
+            return False
+
+    def handle_submit_result(self, result, question, answers, ans_text):
+
+        try:
             if result.get('code') == 0:
                 data = result.get('data', {})
                 
@@ -1276,9 +3607,10 @@ class QuizSession:
                     
                     if 'correct_answer' in data and not is_correct:
                         correct_answer = data.get('correct_answer', {})
-                        logger.info(f"提交结果: {correct_text}，正确答案: {correct_answer.get('ans_text')}")
+                        logger.info("提交结果: %s，正确答案: %s", correct_text, correct_answer.get('ans_text'))
                     else:
-                        logger.info(f"提交结果: {correct_text}")
+                        logger.info("提交结果: %s", correct_text)
+                    self.record_answer(question, answers, ans_text, is_correct, data.get('correct_answer'))
                     
 
                     if is_last:
@@ -1293,7 +3625,8 @@ class QuizSession:
                     if not correct and 'correct_answer' in data:
                         correct_answer = data.get('correct_answer', {})
                         if isinstance(correct_answer, dict) and 'ans_text' in correct_answer:
-                            logger.info(f"正确答案: {correct_answer.get('ans_text')}")
+                            logger.info("正确答案: %s", correct_answer.get('ans_text'))
+                    self.record_answer(question, answers, ans_text, correct, data.get('correct_answer'))
             
                 return True
             
@@ -1307,13 +3640,34 @@ class QuizSession:
                 return False
             
         except Exception as e:
-            logger.error(f"提交答案时出错: {str(e)}")
+            logger.error(f"处理提交结果时出错: {str(e)}")
             return False
 
+    def record_answer(self, question, answers, ans_text, is_correct, correct_answer=None):
+
+        if self.bookkeeping is not None:
+            submit_in_context(self.bookkeeping, self.store_answer, question, answers, ans_text, is_correct, correct_answer)
+        else:
+            self.store_answer(question, answers, ans_text, is_correct, correct_answer)
+
+    def store_answer(self, question, answers, ans_text, is_correct, correct_answer=None):
+
+        try:
+            if is_correct:
+                answer_bank.record(question, answers, correct_text=ans_text)
+            elif isinstance(correct_answer, dict) and correct_answer.get('ans_text'):
+                answer_bank.record(question, answers,
+                                   correct_text=correct_answer.get('ans_text'), wrong_text=ans_text)
+            else:
+                answer_bank.record(question, answers, wrong_text=ans_text)
+        except Exception as e:
+            logger.error(f"记录题库失败: {str(e)}")
+
     def print_result(self):
     
         try:
-            result = question_result()
+            result = question_result(account=self.account)
+            self.final_result = result
             if result:
                 total_score = result.get('score', 0)
                 logger.info(f"最终得分: {total_score}")
@@ -1331,11 +3685,736 @@ class QuizSession:
                 else:
                     logger.info("😢 很遗憾, 答题未通过，请重新尝试。")
                     logger.info("提示: 尝试选择不同的分类可能会提高通过率。")
-            
+            return result
         except Exception as e:
             logger.error(f"获取答题结果时出错: {str(e)}")
+            return None
+
+
+
+def load_account(path, validate=True):
+
+    with open(path, 'r', encoding='utf-8') as f:
+        auth_data = json.load(f)
+    account = BiliAccount.from_auth_data(auth_data, name=Path(path).stem)
+    if not validate:
+        return account
+
+    auth_data, changed = ensure_auth_valid(auth_data, account=account)
+    if not auth_data:
+        logger.error(f"[{account.name}] 认证信息已失效且无法刷新，请重新扫码登录")
+        return None
+    if changed:
+        write_auth_file(path, auth_data)
+        account = BiliAccount.from_auth_data(auth_data, name=account.name)
+    return account
+
+def load_accounts(auth_dir, validate=True, concurrency=8):
+
+    paths = sorted(Path(auth_dir).glob('*.json'))
+    accounts = []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(paths) or 1)), thread_name_prefix='auth-check') as executor:
+        futures = {executor.submit(load_account, path, validate): path for path in paths}
+        for future, path in futures.items():
+            try:
+                account = future.result()
+            except Exception as e:
+                logger.error(f"读取账号认证文件失败 {path}: {str(e)}")
+                continue
+            if account is not None:
+                accounts.append(account)
+    return accounts
+
+def quota_day(timestamp=None):
+
+    return datetime.fromtimestamp(timestamp or time.time(), QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+def seconds_until_quota_reset(timestamp=None):
+
+    now = datetime.fromtimestamp(timestamp or time.time(), QUOTA_TIMEZONE)
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (tomorrow - now).total_seconds()
+
+
+class AccountStore:
+    SECRET_FIELDS = ('access_token', 'refresh_token', 'cookie', 'csrf')
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS accounts (
+            mid TEXT PRIMARY KEY,
+            name TEXT,
+            access_token BLOB NOT NULL,
+            refresh_token BLOB,
+            cookie BLOB,
+            csrf BLOB,
+            expires_at INTEGER,
+            attempt_day TEXT,
+            attempts_today INTEGER NOT NULL DEFAULT 0,
+            last_attempt_at INTEGER,
+            last_score INTEGER,
+            failures INTEGER NOT NULL DEFAULT 0,
+            retry_at INTEGER,
+            passed INTEGER NOT NULL DEFAULT 0,
+            disabled INTEGER NOT NULL DEFAULT 0,
+            created_at INTEGER,
+            updated_at INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_accounts_eligible
+            ON accounts (disabled, passed, attempt_day, attempts_today, last_attempt_at);
+        CREATE TABLE IF NOT EXISTS secrets (
+            name TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            updated_at INTEGER
+        );
+    """
+    MIGRATIONS = {
+        'failures': 'ALTER TABLE accounts ADD COLUMN failures INTEGER NOT NULL DEFAULT 0',
+        'retry_at': 'ALTER TABLE accounts ADD COLUMN retry_at INTEGER',
+    }
+
+    def __init__(self, path=ACCOUNT_DB_FILE, key_path=ACCOUNT_KEY_FILE):
+        self.path = path
+        self.key_path = key_path
+        self.conn = None
+        self.fernet = None
+        self.lock = threading.RLock()
+
+    def open(self):
+
+        with self.lock:
+            if self.conn is not None:
+                return self.conn
+            import sqlite3
+            try:
+                from cryptography.fernet import Fernet
+            except ImportError:
+                raise RuntimeError("账号库需要安装 cryptography: pip install cryptography")
+            self.fernet = Fernet(self.load_key(Fernet))
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(self.SCHEMA)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(accounts)')}
+            for column, statement in self.MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+            self.conn = conn
+            return conn
+
+    def load_key(self, fernet_cls):
+
+        key = os.environ.get('BILIRAKU_STORE_KEY')
+        if key:
+            return key.encode()
+        if os.path.exists(self.key_path):
+            with open(self.key_path, 'rb') as f:
+                return f.read().strip()
+        key = fernet_cls.generate_key()
+        os.makedirs(os.path.dirname(os.path.abspath(self.key_path)), exist_ok=True)
+        fd = os.open(self.key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+        logger.info(f"已生成账号库加密密钥: {self.key_path}")
+        return key
+
+    def close(self):
+
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    @contextmanager
+    def transaction(self):
+
+        with self.lock:
+            conn = self.open()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def encrypt(self, value):
+        return self.fernet.encrypt(str(value).encode('utf-8')) if value else None
+
+    def decrypt(self, value):
+        return self.fernet.decrypt(bytes(value)).decode('utf-8') if value else ''
+
+    def row_to_dict(self, row):
+
+        data = dict(row)
+        for field in self.SECRET_FIELDS:
+            data[field] = self.decrypt(data[field])
+        data['uid'] = data['mid']
+        return data
+
+    def upsert(self, auth_data, name=None):
+
+        mid = str(auth_data.get('mid') or auth_data.get('uid') or '')
+        if not mid or not auth_data.get('access_token'):
+            raise ValueError('认证数据缺少mid或access_token')
+        self.open()
+        now = int(time.time())
+        secrets = {field: self.encrypt(auth_data.get(field)) for field in self.SECRET_FIELDS}
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO accounts (mid, name, access_token, refresh_token, cookie, csrf, expires_at, created_at, updated_at)
+                VALUES (:mid, :name, :access_token, :refresh_token, :cookie, :csrf, :expires_at, :now, :now)
+                ON CONFLICT(mid) DO UPDATE SET
+                    name = COALESCE(excluded.name, accounts.name),
+                    access_token = excluded.access_token,
+                    refresh_token = COALESCE(excluded.refresh_token, accounts.refresh_token),
+                    cookie = COALESCE(excluded.cookie, accounts.cookie),
+                    csrf = COALESCE(excluded.csrf, accounts.csrf),
+                    expires_at = COALESCE(excluded.expires_at, accounts.expires_at),
+                    disabled = 0,
+                    updated_at = excluded.updated_at
+                """,
+                {'mid': mid, 'name': name, 'expires_at': auth_data.get('expires_at'), 'now': now, **secrets}
+            )
+        return mid
+
+    def get_secret(self, name, default=None):
+
+        with self.lock:
+            row = self.open().execute('SELECT value FROM secrets WHERE name = ?', (name,)).fetchone()
+        return json.loads(self.decrypt(row['value'])) if row else default
+
+    def set_secret(self, name, value):
+
+        self.open()
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT INTO secrets (name, value, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at',
+                (name, self.encrypt(json.dumps(value, ensure_ascii=False)), int(time.time()))
+            )
+
+    def delete_secret(self, name):
+
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM secrets WHERE name = ?', (name,))
+
+    def migrate_plaintext_files(self):
+
+        migrated = []
+        for name, path in (('interactive_auth', AUTH_FILE), ('deepseek_key', DEEPSEEK_KEY_FILE), ('jfbym_key', CLOUD_CONFIG_FILE)):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.set_secret(name, json.load(f))
+                os.remove(path)
+                migrated.append(path)
+            except Exception as e:
+                logger.error(f"迁移 {path} 到加密账号库失败: {str(e)}")
+        if migrated:
+            logger.info(f"已将明文凭据迁移到加密账号库并删除原文件: {', '.join(migrated)}")
+        return migrated
+
+    def get(self, mid):
+
+        with self.lock:
+            row = self.open().execute('SELECT * FROM accounts WHERE mid = ?', (str(mid),)).fetchone()
+        return self.row_to_dict(row) if row else None
+
+    def all(self):
+
+        with self.lock:
+            rows = self.open().execute('SELECT * FROM accounts ORDER BY mid').fetchall()
+        return [self.row_to_dict(row) for row in rows]
+
+    def eligible(self, limit=None, daily_limit=DAILY_ATTEMPT_LIMIT, now=None, cooldown=0, exclude=()):
+
+        now = now or time.time()
+        today = quota_day(now)
+        query = """
+            SELECT * FROM accounts
+            WHERE disabled = 0 AND passed = 0
+              AND (attempt_day IS NOT ? OR attempts_today < ?)
+              AND (last_attempt_at IS NULL OR last_attempt_at <= ?)
+              AND (retry_at IS NULL OR retry_at <= ?)
+        """
+        params = [today, daily_limit, int(now - cooldown), int(now)]
+        if exclude:
+            query += f" AND mid NOT IN ({','.join('?' * len(exclude))})"
+            params.extend(str(mid) for mid in exclude)
+        query += """
+            ORDER BY attempt_day IS ? DESC, COALESCE(last_score, -1) DESC, last_attempt_at IS NOT NULL, last_attempt_at
+        """
+        params.append(today)
+        if limit:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+        with self.lock:
+            rows = self.open().execute(query, params).fetchall()
+        return [self.row_to_dict(row) for row in rows]
+
+    def record_attempt(self, mid, score=None, passed=False, quota_exhausted=False, daily_limit=DAILY_ATTEMPT_LIMIT):
+
+        now = int(time.time())
+        today = quota_day(now)
+        with self.transaction() as conn:
+            row = conn.execute('SELECT attempt_day, attempts_today FROM accounts WHERE mid = ?', (str(mid),)).fetchone()
+            if row is None:
+                return
+            attempts = row['attempts_today'] if row['attempt_day'] == today else 0
+            attempts = daily_limit if quota_exhausted else attempts + 1
+            conn.execute(
+                """
+                UPDATE accounts SET attempt_day = ?, attempts_today = ?, last_attempt_at = ?,
+                    last_score = COALESCE(?, last_score), passed = MAX(passed, ?), failures = 0,
+                    retry_at = NULL, updated_at = ?
+                WHERE mid = ?
+                """,
+                (today, attempts, now, score, int(bool(passed)), now, str(mid))
+            )
+
+    def record_failure(self, mid, backoff=FAILURE_BACKOFF, max_backoff=FAILURE_MAX_BACKOFF):
+
+        now = int(time.time())
+        with self.transaction() as conn:
+            row = conn.execute('SELECT failures FROM accounts WHERE mid = ?', (str(mid),)).fetchone()
+            if row is None:
+                return None
+            failures = row['failures'] + 1
+            delay = int(min(max_backoff, backoff * 2 ** (failures - 1)))
+            conn.execute(
+                'UPDATE accounts SET last_attempt_at = ?, failures = ?, retry_at = ?, updated_at = ? WHERE mid = ?',
+                (now, failures, now + delay, now, str(mid))
+            )
+        return delay
+
+    def record_result(self, result):
+
+        if not result.get('mid'):
+            return
+        if result.get('answered') or result.get('quota_exhausted'):
+            self.record_attempt(
+                result['mid'],
+                score=result.get('score'),
+                passed=result.get('passed'),
+                quota_exhausted=result.get('quota_exhausted'),
+            )
+        else:
+            delay = self.record_failure(result['mid'])
+            if delay is not None:
+                logger.warning(f"[{result.get('account')}] 未能开始答题({result.get('error') or '未答题'})，{delay} 秒后再试")
+
+    def disable(self, mid):
+
+        with self.transaction() as conn:
+            conn.execute('UPDATE accounts SET disabled = 1, updated_at = ? WHERE mid = ?', (int(time.time()), str(mid)))
+
+    def import_auth_dir(self, auth_dir):
+
+        imported = 0
+        for path in sorted(Path(auth_dir).glob('*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    auth_data = json.load(f)
+                self.upsert(auth_data, name=path.stem)
+                imported += 1
+            except Exception as e:
+                logger.error(f"导入认证文件失败 {path}: {str(e)}")
+        logger.info(f"已导入 {imported} 个账号到账号库: {self.path}")
+        return imported
+
+    def load_account(self, auth_data, validate=True):
+
+        account = BiliAccount.from_auth_data(auth_data, name=auth_data.get('name'))
+        if not validate:
+            return account
+        refreshed, changed = ensure_auth_valid(auth_data, account=account)
+        if not refreshed:
+            logger.error(f"[{account.name}] 认证信息已失效且无法刷新，已在账号库中停用")
+            self.disable(auth_data['mid'])
+            return None
+        if changed:
+            self.upsert(refreshed)
+            account = BiliAccount.from_auth_data(refreshed, name=account.name)
+        return account
+
+    def load_accounts(self, validate=True, concurrency=8, limit=None):
+
+        rows = self.eligible(limit=limit)
+        accounts = []
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(rows) or 1)), thread_name_prefix='auth-check') as executor:
+            futures = {executor.submit(self.load_account, row, validate): row for row in rows}
+            for future, row in futures.items():
+                try:
+                    account = future.result()
+                except Exception as e:
+                    logger.error(f"加载账号 {row['mid']} 失败: {str(e)}")
+                    continue
+                if account is not None:
+                    accounts.append(account)
+        return accounts
+
+
+account_store = AccountStore()
+
+
+def secret_store():
+
+    global SECRET_STORE_CHECKED
+    try:
+        account_store.open()
+    except Exception as e:
+        if not SECRET_STORE_CHECKED:
+            logger.warning(f"加密账号库不可用，凭据将以明文保存: {str(e)}")
+            SECRET_STORE_CHECKED = True
+        return None
+    if not SECRET_STORE_CHECKED:
+        SECRET_STORE_CHECKED = True
+        account_store.migrate_plaintext_files()
+    return account_store
+
+def read_saved_auth():
+
+    store = secret_store()
+    if store is not None:
+        return store.get_secret('interactive_auth')
+    if os.path.exists(AUTH_FILE):
+        with open(AUTH_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return None
+
+def write_saved_auth(auth_data):
+
+    store = secret_store()
+    if store is not None:
+        store.set_secret('interactive_auth', auth_data)
+    else:
+        write_auth_file(AUTH_FILE, auth_data)
+
+def remove_saved_auth():
+
+    store = secret_store()
+    if store is not None:
+        store.delete_secret('interactive_auth')
+    if os.path.exists(AUTH_FILE):
+        os.remove(AUTH_FILE)
+
+
+def run_account(account, pipeline=False):
+
+    started = time.time()
+    quiz = QuizSession(account=account, interactive=False, pipeline=pipeline)
+    error = None
+    with log_context(account=account.name):
+        logger.info(f"[{account.name}] 开始答题")
+        try:
+            quiz.start()
+        except Exception as e:
+            error = str(e)
+            logger.error(f"[{account.name}] 答题出错: {error}")
+
+    result = quiz.final_result or {}
+    score = result.get('score')
+    return {
+        'account': account.name,
+        'mid': account.mid,
+        'answered': quiz.answered_questions,
+        'score': score,
+        'passed': bool(score is not None and score >= 60),
+        'quota_exhausted': account.quota_exhausted,
+        'error': error,
+        'elapsed': round(time.time() - started, 2),
+    }
+
+class AccountScheduler:
+    def __init__(self, store=None, concurrency=4, pipeline=False, interval=300, cooldown=1800,
+                 daily_limit=DAILY_ATTEMPT_LIMIT):
+        self.store = store or account_store
+        self.concurrency = max(1, int(concurrency))
+        self.pipeline = pipeline
+        self.interval = interval
+        self.cooldown = cooldown
+        self.daily_limit = daily_limit
+        self.running = {}
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def next_accounts(self, count):
+
+        return self.store.eligible(
+            limit=count,
+            daily_limit=self.daily_limit,
+            cooldown=self.cooldown,
+            exclude=tuple(self.running.values()),
+        )
+
+    def run_row(self, row):
+
+        name = row.get('name') or row['mid']
+        try:
+            account = self.store.load_account(row)
+        except Exception as e:
+            logger.error(f"加载账号 {row['mid']} 失败: {str(e)}")
+            account, error = None, str(e)
+        else:
+            error = '认证信息无效'
+        if account is None:
+            return {'account': name, 'mid': row['mid'], 'answered': 0, 'score': None,
+                    'passed': False, 'quota_exhausted': False, 'error': error}
+        return run_account(account, self.pipeline)
+
+    def idle_seconds(self):
+
+        return max(1.0, min(self.interval, seconds_until_quota_reset() + 5))
+
+    def handle_result(self, future, mid):
+
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"[{mid}] 答题线程出错: {str(e)}")
+            metrics.inc('scheduler_runs_total', result='error')
+            self.store.record_failure(mid)
+            return
+        self.store.record_result(result)
+        if result.get('passed'):
+            outcome = 'passed'
+        elif result.get('quota_exhausted'):
+            outcome = 'quota_exhausted'
+        elif not result.get('answered'):
+            outcome = 'error'
+        else:
+            outcome = 'failed'
+        metrics.inc('scheduler_runs_total', result=outcome)
+        logger.info(f"[{result.get('account')}] 答题结束: 得分 {result.get('score')}，结果 {outcome}")
+
+    def run_forever(self):
+
+        logger.info(f"账号调度器已启动，并发数 {self.concurrency}")
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='quiz-scheduler') as executor:
+            try:
+                while not self.stop_event.is_set():
+                    free = self.concurrency - len(self.running)
+                    if free > 0:
+                        for row in self.next_accounts(free):
+                            future = executor.submit(self.run_row, row)
+                            self.running[future] = row['mid']
+
+                    if not self.running:
+                        idle = self.idle_seconds()
+                        logger.info(f"暂无可答题的账号，{idle:.0f} 秒后重新检查")
+                        self.stop_event.wait(idle)
+                        continue
+
+                    done, _ = wait(list(self.running), timeout=self.interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.handle_result(future, self.running.pop(future))
+            except KeyboardInterrupt:
+                logger.info("收到中断信号，等待进行中的答题结束...")
+                self.stop_event.set()
+            for future in list(self.running):
+                self.handle_result(future, self.running.pop(future))
+        logger.info("账号调度器已停止")
+
+
+def run_batch(auth_dir, concurrency=4, summary_path=None, pipeline=False):
+
+    store = None if auth_dir else account_store
+    accounts = store.load_accounts() if store else load_accounts(auth_dir)
+    if not accounts:
+        logger.error(f"没有可用的账号: {auth_dir or store.path}")
+        return None
+
+    concurrency = max(1, min(int(concurrency), len(accounts)))
+    logger.info(f"批量答题: 共 {len(accounts)} 个账号，并发数 {concurrency}")
+
+    started = time.time()
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='quiz-batch') as executor:
+        futures = {executor.submit(run_account, account, pipeline): account for account in accounts}
+        for future, account in futures.items():
+            try:
+                result = future.result()
+                results.append(result)
+                if store:
+                    store.record_result(result)
+            except Exception as e:
+                logger.error(f"[{account.name}] 答题线程出错: {str(e)}")
+                results.append({'account': account.name, 'mid': account.mid, 'error': str(e)})
+
+    summary = {
+        'started_at': datetime.fromtimestamp(started).strftime("%Y-%m-%d %H:%M:%S"),
+        'elapsed': round(time.time() - started, 2),
+        'concurrency': concurrency,
+        'total': len(results),
+        'passed': sum(1 for item in results if item.get('passed')),
+        'accounts': results,
+    }
+
+    if summary_path is None:
+        summary_path = os.path.join(LOG_DIR, f'batch_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.json')
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=4)
+        logger.info(f"批量答题结果已保存到: {summary_path}")
+    except Exception as e:
+        logger.error(f"保存批量答题结果失败: {str(e)}")
+
+    logger.info(f"批量答题完成: {summary['passed']}/{summary['total']} 个账号通过")
+    return summary
+
+
+def load_warmup_questions(path):
+
+    questions = []
+    is_log = re.search(r'\.log(\.\d+)?(\.gz)?$', path) is not None
+    if path.endswith('.gz'):
+        import gzip
+        f = gzip.open(path, 'rt', encoding='utf-8')
+    else:
+        f = open(path, 'r', encoding='utf-8')
+    with f:
+        if is_log:
+            current = {}
+            for line in f:
+                line = line.rstrip('\n')
+                if line.startswith('{'):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    message, session = entry.get('message', ''), entry.get('session') or entry.get('thread')
+                else:
+                    message, session = line.split(' - INFO - ', 1)[-1], None
+                if message.startswith('题目: '):
+                    current[session] = {'question': message[len('题目: '):], 'options': []}
+                    questions.append(current[session])
+                elif session in current and re.match(r'^选项\d+: ', message):
+                    current[session]['options'].append(message.split(': ', 1)[1])
+        elif path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    questions.append(json.loads(line))
+        else:
+            questions = json.load(f)
+
+    unique = {}
+    for item in questions:
+        question = item.get('question')
+        options = item.get('options') or [ans.get('ans_text') for ans in item.get('answers', [])]
+        if question and len(options) >= 2:
+            unique[question_key(question, options)] = (question, options)
+    return list(unique.values())
+
+def run_warmup(path, batch_size=20, concurrency=4, engine=None):
+
+    engine = engine or create_answer_engine()
+    batch_engine = engine.batch_engine()
+    if batch_engine is None:
+        logger.error(f"答题引擎 {engine.name} 不支持批量预热")
+        return 0
+    if batch_engine is not engine:
+        logger.info(f"答题引擎 {engine.name} 使用成员引擎 {batch_engine.name} 进行批量预热")
+
+    items = []
+    for question, options in load_warmup_questions(path):
+        answers = [{'ans_text': option} for option in options]
+        if answer_bank.lookup(question, answers) is None:
+            items.append((question, options))
+    if not items:
+        logger.info("所有题目均已在本地题库中，无需预热")
+        return 0
+
+    batches = [items[i:i+batch_size] for i in range(0, len(items), batch_size)]
+    logger.info(f"题库预热: 共 {len(items)} 道新题目，分 {len(batches)} 批，并发数 {concurrency}")
+
+    stored = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='warmup') as executor:
+        futures = {executor.submit(batch_engine.ask_batch, batch): batch for batch in batches}
+        for future, batch in futures.items():
+            try:
+                answers = future.result()
+            except Exception as e:
+                logger.error(f"批量预热请求失败: {str(e)}")
+                continue
+            for index, choice in answers.items():
+                question, options = batch[index]
+                answer_bank.record(
+                    question,
+                    [{'ans_text': option} for option in options],
+                    correct_text=options[choice-1],
+                    source='warmup',
+                    save=False
+                )
+                stored += 1
+            answer_bank.save()
+            logger.info(f"本批预热完成: {len(answers)}/{len(batch)} 道题获得答案")
+
+    logger.info(f"题库预热完成，共写入 {stored} 道题")
+    return stored
 
 
+def load_captcha_samples(directory):
+
+    if os.path.exists(os.path.join(directory, 'labels.json')):
+        return [(Path(path), label) for path, label in CaptchaCache(directory).labeled()]
+
+    samples = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() not in ('.png', '.jpg', '.jpeg', '.gif', '.bmp'):
+            continue
+        label = path.stem.split('_', 1)[0]
+        if label:
+            samples.append((path, label))
+    return samples
+
+def run_captcha_benchmark(directory, backend=None, output=None):
+
+    samples = load_captcha_samples(directory)
+    if not samples:
+        logger.error(f"目录中没有带标注的验证码图片: {directory}")
+        return None
+
+    report = {'directory': str(directory), 'samples': len(samples), 'backends': {}}
+    for name, recognizer in captcha_recognizers(backend):
+        latencies = []
+        correct = 0
+        failed = 0
+        for path, label in samples:
+            image_data = path.read_bytes()
+            started = time.perf_counter()
+            text = recognizer(image_data)
+            latencies.append(time.perf_counter() - started)
+            if not text:
+                failed += 1
+            elif text.strip().lower() == label.lower():
+                correct += 1
+        latencies.sort()
+        result = {
+            'accuracy': round(correct / len(samples), 4),
+            'failed': failed,
+            'mean': round(sum(latencies) / len(latencies), 4),
+            'p50': round(latencies[min(len(latencies) - 1, int(0.5 * len(latencies)))], 4),
+            'p90': round(latencies[min(len(latencies) - 1, int(0.9 * len(latencies)))], 4),
+        }
+        report['backends'][recognizer.__name__] = result
+        logger.info(f"{name}: 准确率 {correct}/{len(samples)}，平均耗时 {result['mean']}s，p90 {result['p90']}s")
+
+    if not report['backends']:
+        logger.error("没有可用的验证码识别后端，请检查 captcha_backend / local_captcha_model / jfbym_token 配置")
+        return None
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"验证码识别评测结果已保存到: {output}")
+    return report
+
 def clear_user_data(force=False):
     
     global access_token, csrf, JFBYM_TOKEN, API_KEY_DEEPSEEK, USE_CLOUD_CAPTCHA, AUTO_SELECT_CATEGORY
@@ -1353,6 +4432,12 @@ def clear_user_data(force=False):
         return
         
     
+    store = secret_store()
+    if store is not None:
+        for name in ('interactive_auth', 'deepseek_key', 'jfbym_key'):
+            store.delete_secret(name)
+        logger.info("已清除加密账号库中保存的凭据")
+
     config_files = [
         AUTH_FILE,
         DEEPSEEK_KEY_FILE,
@@ -1383,14 +4468,15 @@ def get_user_info():
     
     try:
         
-        url = 'https://api.bilibili.com/x/web-interface/nav'
+        url = f'{API_BASE_URL}/x/web-interface/nav'
         
-        response = session.get(
+        response = http_sessions.get(url).get(
             url,
             headers={
                 'User-Agent': API_CONFIG['user_agent'],
                 'Referer': 'https://www.bilibili.com/'
             },
+            timeout=REQUEST_TIMEOUT,
             verify=False
         )
         
@@ -1402,7 +4488,7 @@ def get_user_info():
         data = response.json()
         
         
-        logger.debug(f"获取用户信息响应: {data}")
+        logger.debug("获取用户信息响应: %s", data)
         
         if data.get('code') == 0:
             if data.get('data', {}).get('isLogin', False):
@@ -1431,7 +4517,35 @@ def load_config():
         'jfbym_type': '10103',
         'use_cloud_captcha': False,
         'auto_select_category': False,
-        'category_id': '6'
+        'category_id': '6',
+        'pipeline_mode': False,
+        'batch_concurrency': 4,
+        'http_pool_size': 10,
+        'deepseek_stream': DEFAULT_DEEPSEEK_STREAM,
+        'deepseek_max_tokens': DEFAULT_DEEPSEEK_MAX_TOKENS,
+        'answer_engine': 'deepseek',
+        'engine_base_url': 'http://127.0.0.1:8080/v1',
+        'engine_model': 'local',
+        'engine_api_key': '',
+        'warmup_batch_size': 20,
+        'ensemble_engines': [],
+        'ensemble_samples': DEFAULT_ENSEMBLE_SAMPLES,
+        'ensemble_deadline': DEFAULT_ENSEMBLE_DEADLINE,
+        'hedge_enabled': False,
+        'hedge_quantile': 0.9,
+        'hedge_budget': 20,
+        'api_base_url': '',
+        'passport_base_url': '',
+        'captcha_backend': 'cloud',
+        'local_captcha_model': '',
+        'local_captcha_charset': '',
+        'captcha_race': False,
+        'scheduler_interval': 300,
+        'scheduler_cooldown': 1800,
+        'rate_limits': {},
+        'circuit_failure_threshold': 5,
+        'circuit_cooldown': 5,
+        'circuit_max_cooldown': 120
     }
     
     try:
@@ -1486,9 +4600,40 @@ def save_config(config, config_path=None):
     except Exception as e:
         logger.error(f"保存配置文件出错: {str(e)}")
 
+def apply_config(config):
+
+    global API_KEY_DEEPSEEK, JFBYM_TOKEN, JFBYM_TYPE, USE_CLOUD_CAPTCHA, AUTO_SELECT_CATEGORY, AUTO_CATEGORY_ID
+    global DEEPSEEK_STREAM, DEEPSEEK_MAX_TOKENS, ANSWER_ENGINE_CONFIG
+    global CAPTCHA_BACKEND, LOCAL_CAPTCHA_MODEL, LOCAL_CAPTCHA_CHARSET, CAPTCHA_RACE
+
+    cloud = {} if config.get('jfbym_token') else load_cloud_token()
+    API_KEY_DEEPSEEK = config.get('deepseek_api_key') or load_api_key()
+    JFBYM_TOKEN = config.get('jfbym_token') or cloud.get('token', '')
+    JFBYM_TYPE = config.get('jfbym_type') or cloud.get('type') or '10103'
+    USE_CLOUD_CAPTCHA = bool(config.get('use_cloud_captcha', False) and JFBYM_TOKEN)
+    CAPTCHA_BACKEND = config.get('captcha_backend', 'cloud')
+    LOCAL_CAPTCHA_MODEL = config.get('local_captcha_model', '')
+    LOCAL_CAPTCHA_CHARSET = config.get('local_captcha_charset', '')
+    CAPTCHA_RACE = config.get('captcha_race', False)
+    AUTO_SELECT_CATEGORY = config.get('auto_select_category', False)
+    AUTO_CATEGORY_ID = config.get('category_id', '6')
+    DEEPSEEK_STREAM = config.get('deepseek_stream', DEFAULT_DEEPSEEK_STREAM)
+    DEEPSEEK_MAX_TOKENS = config.get('deepseek_max_tokens', DEFAULT_DEEPSEEK_MAX_TOKENS)
+    ANSWER_ENGINE_CONFIG = dict(config)
+    set_base_urls(config.get('api_base_url'), config.get('passport_base_url'))
+    http_sessions.configure(pool_size=config.get('http_pool_size', HTTP_POOL_SIZE))
+    rate_limiter.configure(config.get('rate_limits'))
+    circuit_breakers.configure(
+        config.get('circuit_failure_threshold'),
+        config.get('circuit_cooldown'),
+        config.get('circuit_max_cooldown')
+    )
+
 def main():
+    interactive = True
+    metrics_dump = ''
     try:
-        global API_KEY_DEEPSEEK, USE_CLOUD_CAPTCHA, JFBYM_TOKEN, AUTO_SELECT_CATEGORY, AUTO_CATEGORY_ID
+        global AUTO_SELECT_CATEGORY, AUTO_CATEGORY_ID
         
         print("\n===================================")
         print("B站硬核会员自动答题工具")
@@ -1503,31 +4648,137 @@ def main():
         print("基于B站API和DeepSeek的硬核会员自动答题工具\n")
         
         
+        import argparse
+
         parser = argparse.ArgumentParser(description='B站硬核会员自动答题工具')
         parser.add_argument('--clean', action='store_true', help='清除之前的登录信息，强制重新登录')
         parser.add_argument('--reset', action='store_true', help='重置所有配置，包括API密钥和配置信息')
         parser.add_argument('--keep', action='store_true', help='保持之前的登录状态，不清除数据')
         parser.add_argument('--config', action='store_true', help='编辑配置文件')
+        parser.add_argument('--pipeline', action='store_true', help='题库写入放到后台线程，不阻塞下一题')
+        parser.add_argument('--batch', metavar='DIR', nargs='?', const='', help='无人值守批量答题，读取目录下每个账号的认证文件(*.json)；不指定目录时使用账号库')
+        parser.add_argument('--daemon', action='store_true', help='常驻运行账号调度器，持续为账号库中有剩余次数的账号答题')
+        parser.add_argument('--import-accounts', metavar='DIR', help='把目录下的认证文件(*.json)导入加密账号库')
+        parser.add_argument('--concurrency', type=int, default=None, help='批量答题的并发账号数')
+        parser.add_argument('--summary', metavar='FILE', help='批量答题结果汇总JSON的保存路径')
+        parser.add_argument('--warmup', metavar='FILE', help='根据题目文件(.json/.jsonl)或历史日志(.log/.log.N.gz)批量预热本地题库')
+        parser.add_argument('--warmup-batch', type=int, default=None, help='题库预热时每个请求包含的题目数')
+        parser.add_argument('--api-base', metavar='URL', help='覆盖B站API地址，例如指向本地模拟服务器 http://127.0.0.1:8765')
+        parser.add_argument('--passport-base', metavar='URL', help='覆盖B站登录接口地址，默认与--api-base相同')
+        parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help='日志级别(也可用环境变量 BILIRAKU_LOG_LEVEL 设置)，DEBUG 会记录原始接口响应')
+        parser.add_argument('--metrics-port', type=int, default=None, help='在本地端口提供Prometheus格式的性能指标(/metrics)')
+        parser.add_argument('--metrics-dump', metavar='FILE', help='定期将性能指标以JSON格式写入文件')
+        parser.add_argument('--metrics-interval', type=int, default=60, help='写入性能指标JSON的间隔(秒)')
+        parser.add_argument('--login', type=int, metavar='N', help='同时发起N个扫码登录，把每个账号写入加密账号库')
+        parser.add_argument('--board-port', type=int, metavar='PORT', help='配合--login使用，在本地网页上集中显示所有待扫码的二维码(0为随机端口)')
+        parser.add_argument('--auth-dir', metavar='DIR', help='扫码登录时另外把明文认证文件导出到该目录(默认只写入加密账号库)')
+        parser.add_argument('--captcha-bench', metavar='DIR', help='用目录中已标注的验证码图片(文件名即答案)评测识别准确率和耗时')
+        parser.add_argument('--captcha-backend', choices=['cloud', 'local', 'auto'], help='评测时使用的验证码识别后端')
         args = parser.parse_args()
+
+
+        if args.log_level:
+            logger.setLevel(args.log_level)
+
+        if args.metrics_port:
+            start_metrics_server(args.metrics_port)
+        if args.metrics_dump:
+            metrics_dump = args.metrics_dump
+            start_metrics_dump(metrics_dump, args.metrics_interval)
+
+
+        if args.login:
+            interactive = False
+            config, _ = load_config()
+            apply_config(config)
+            set_base_urls(args.api_base, args.passport_base or args.api_base)
+            onboard_accounts(args.login, args.auth_dir, board_port=args.board_port)
+            return
+
+
+        if args.captcha_bench:
+            interactive = False
+            config, _ = load_config()
+            apply_config(config)
+            run_captcha_benchmark(
+                args.captcha_bench,
+                backend=args.captcha_backend,
+                output=os.path.join(LOG_DIR, f'captcha_bench_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.json')
+            )
+            return
+
+
+        if args.warmup:
+            interactive = False
+            config, _ = load_config()
+            apply_config(config)
+            set_base_urls(args.api_base, args.passport_base or args.api_base)
+            run_warmup(
+                args.warmup,
+                batch_size=args.warmup_batch or config.get('warmup_batch_size', 20),
+                concurrency=args.concurrency or config.get('batch_concurrency', 4),
+            )
+            return
+
+
+        if args.daemon:
+            interactive = False
+            config, _ = load_config()
+            apply_config(config)
+            set_base_urls(args.api_base, args.passport_base or args.api_base)
+            if config.get('answer_engine', 'deepseek') == 'deepseek' and not API_KEY_DEEPSEEK:
+                logger.error("配置文件中缺少DeepSeek API密钥，无法启动调度器")
+                return
+            AccountScheduler(
+                concurrency=args.concurrency or config.get('batch_concurrency', 4),
+                pipeline=args.pipeline or config.get('pipeline_mode', False),
+                interval=config.get('scheduler_interval', 300),
+                cooldown=config.get('scheduler_cooldown', 1800),
+            ).run_forever()
+            return
+
+
+        if args.import_accounts:
+            interactive = False
+            account_store.import_auth_dir(args.import_accounts)
+            return
+
+
+        if args.batch is not None:
+            interactive = False
+            config, _ = load_config()
+            apply_config(config)
+            set_base_urls(args.api_base, args.passport_base or args.api_base)
+            if config.get('answer_engine', 'deepseek') == 'deepseek' and not API_KEY_DEEPSEEK:
+                logger.error("配置文件中缺少DeepSeek API密钥，无法进行批量答题")
+                return
+            concurrency = args.concurrency or config.get('batch_concurrency', 4)
+            run_batch(
+                args.batch,
+                concurrency=concurrency,
+                summary_path=args.summary,
+                pipeline=args.pipeline or config.get('pipeline_mode', False),
+            )
+            return
         
         
-        has_previous_login = os.path.exists(AUTH_FILE)
+        try:
+            previous_auth = read_saved_auth()
+        except Exception as e:
+            logger.error(f"读取之前的登录信息失败: {str(e)}")
+            previous_auth = None
+        has_previous_login = bool(previous_auth)
         
         
         if not (args.keep or args.clean) and has_previous_login:
             
             previous_auth_info = "未知账户"
-            try:
-                with open(AUTH_FILE, 'r') as f:
-                    auth_data = json.load(f)
-                    if 'uid' in auth_data and auth_data['uid']:
-                        previous_auth_info = f"UID: {auth_data['uid']}"
-                        logger.info(f"找到之前的登录信息: {previous_auth_info}")
-            except Exception as e:
-                logger.error(f"读取之前的登录信息失败: {str(e)}")
+            if previous_auth.get('uid'):
+                previous_auth_info = f"UID: {previous_auth['uid']}"
+                logger.info(f"找到之前的登录信息: {previous_auth_info}")
             
             print(f"\n检测到上次登录的账户 ({previous_auth_info})")
-            keep_login = input('是否使用上次的账户登录? [1]是 [2]否: ').strip() or '1'
+            keep_login = prompt('是否使用上次的账户登录? [1]是 [2]否: ').strip() or '1'
             
             if keep_login == '1':
                 logger.info("用户选择使用上次的账户登录")
@@ -1539,9 +4790,9 @@ def main():
         
         if args.clean or (not args.keep and not has_previous_login):
             logger.info("清除之前的登录信息，将重新登录")
-            if os.path.exists(AUTH_FILE):
+            if has_previous_login:
                 try:
-                    os.remove(AUTH_FILE)
+                    remove_saved_auth()
                     logger.info("已清除之前的登录信息")
                 except Exception as e:
                     logger.error(f"清除登录信息失败: {str(e)}")
@@ -1583,62 +4834,90 @@ def main():
             print("  use_cloud_captcha: 是否使用云码API (true/false)")
             print("  auto_select_category: 是否自动选择分类 (true/false)")
             print("  category_id: 分类ID (6:文史类, 推荐)")
-            input("按回车键退出...")
+            print("  pipeline_mode: 是否把题库写入放到后台线程 (true/false)")
+            print("  batch_concurrency: 批量答题的默认并发账号数")
+            print("  http_pool_size: 每个域名的HTTP连接池大小")
+            print("  deepseek_stream: 是否使用流式输出，读到答案序号后立即返回 (true/false)")
+            print("  deepseek_max_tokens: DeepSeek单次回答的最大输出token数")
+            print("  answer_engine: 答题引擎 (deepseek / openai / retrieval / ensemble)")
+            print("  engine_base_url: openai引擎的接口地址，例如本地llama.cpp服务")
+            print("  engine_model: openai引擎使用的模型名")
+            print("  engine_api_key: openai引擎的API密钥，本地服务可留空")
+            print("  warmup_batch_size: 题库预热时每个请求包含的题目数")
+            print("  ensemble_engines: ensemble引擎的成员列表，每项可覆盖answer_engine等配置")
+            print("  ensemble_samples: 每个成员并行采样的次数")
+            print("  ensemble_deadline: 单次投票等待成员返回的最长秒数")
+            print("  hedge_enabled: 答题请求超过延迟阈值时是否发送对冲请求 (true/false)")
+            print("  hedge_quantile: 对冲阈值取最近请求耗时的分位数 (如0.5或0.9)")
+            print("  hedge_budget: 每道题AI作答的总时限(秒)")
+            print("  api_base_url / passport_base_url: 覆盖B站接口地址，留空使用官方地址")
+            print("  captcha_backend: 验证码识别后端 (cloud / local / auto，auto为本地优先、失败后用云码)")
+            print("  local_captcha_model: 本地验证码识别ONNX模型路径")
+            print("  local_captcha_charset: 模型字符表JSON路径，默认与模型同名的 .charset.json")
+            print("  scheduler_interval: 调度器空闲时重新检查账号的间隔(秒)")
+            print("  scheduler_cooldown: 同一账号两次答题之间的最短间隔(秒)")
+            print("  captcha_race: auto后端下同时请求本地模型和云码，采用先返回的结果 (true/false)")
+            prompt("按回车键退出...")
             return
         
         
-        API_KEY_DEEPSEEK = config.get('deepseek_api_key', '')
-        if not API_KEY_DEEPSEEK:
+        api_key = config.get('deepseek_api_key') or load_api_key()
+        if not api_key and config.get('answer_engine', 'deepseek') == 'deepseek':
             logger.info("配置文件中缺少DeepSeek API密钥，请输入")
-            API_KEY_DEEPSEEK = input('请输入DeepSeek API密钥: ').strip()
-            if API_KEY_DEEPSEEK:
-                config['deepseek_api_key'] = API_KEY_DEEPSEEK
-                save_config(config, config_path)
+            api_key = prompt('请输入DeepSeek API密钥: ').strip()
+            if api_key:
+                if secret_store() is not None:
+                    save_api_key(api_key)
+                else:
+                    config['deepseek_api_key'] = api_key
+                    save_config(config, config_path)
             else:
                 logger.error("未配置API密钥，程序退出")
                 return
         
         
-        JFBYM_TOKEN = config.get('jfbym_token', '')
-        JFBYM_TYPE = config.get('jfbym_type', '10103')
-        USE_CLOUD_CAPTCHA = config.get('use_cloud_captcha', False)
+        cloud = {} if config.get('jfbym_token') else load_cloud_token()
+        jfbym_token = config.get('jfbym_token') or cloud.get('token', '')
+        captcha_backend = config.get('captcha_backend', 'cloud')
+        local_captcha_model = config.get('local_captcha_model', '')
         
         
-        if not JFBYM_TOKEN and not USE_CLOUD_CAPTCHA:
+        if captcha_backend != 'cloud' and local_captcha_model:
+            logger.info(f"已配置本地验证码识别模型 ({captcha_backend}): {local_captcha_model}")
+        elif not jfbym_token and not config.get('use_cloud_captcha', False):
             print("是否配置云码API用于自动识别验证码？(不配置将使用浏览器打开验证码)")
-            cloud_choice = input("[1]是 [2]否: ").strip()
+            cloud_choice = prompt("[1]是 [2]否: ").strip()
             if cloud_choice == '1':
-                JFBYM_TOKEN = input('请输入云码API token: ').strip()
+                jfbym_token = prompt('请输入云码API token: ').strip()
                 
                 
-                if (JFBYM_TOKEN.startswith('"') and JFBYM_TOKEN.endswith('"')) or \
-                (JFBYM_TOKEN.startswith("'") and JFBYM_TOKEN.endswith("'")):
-                    JFBYM_TOKEN = JFBYM_TOKEN[1:-1]
+                if (jfbym_token.startswith('"') and jfbym_token.endswith('"')) or \
+                (jfbym_token.startswith("'") and jfbym_token.endswith("'")):
+                    jfbym_token = jfbym_token[1:-1]
                     
-                JFBYM_TYPE = input('请输入验证码类型ID (默认B站验证码类型为10103): ').strip() or '10103'
-                if JFBYM_TOKEN:
+                jfbym_type = prompt('请输入验证码类型ID (默认B站验证码类型为10103): ').strip() or '10103'
+                if jfbym_token:
                     
-                    config['jfbym_token'] = JFBYM_TOKEN
-                    config['jfbym_type'] = JFBYM_TYPE
+                    if not save_cloud_token(jfbym_token, jfbym_type):
+                        config['jfbym_token'] = jfbym_token
+                        config['jfbym_type'] = jfbym_type
                     config['use_cloud_captcha'] = True
                     save_config(config, config_path)
-                    USE_CLOUD_CAPTCHA = True
                     print("云码API配置已保存")
             else:
-                USE_CLOUD_CAPTCHA = False
                 config['use_cloud_captcha'] = False
                 save_config(config, config_path)
                 print("将使用浏览器打开验证码")
-        elif JFBYM_TOKEN and USE_CLOUD_CAPTCHA:
+        elif jfbym_token and config.get('use_cloud_captcha', False):
             logger.info("已从配置文件加载云码API设置")
         
         
-        AUTO_SELECT_CATEGORY = config.get('auto_select_category', False)
-        AUTO_CATEGORY_ID = config.get('category_id', '6')
+        apply_config(config)
+        set_base_urls(args.api_base, args.passport_base or args.api_base)
         
         
-        if not AUTO_SELECT_CATEGORY and USE_CLOUD_CAPTCHA:
-            auto_category = input("是否自动选择分类，无需每次手动选择? [1]是 [2]否: ").strip()
+        if not AUTO_SELECT_CATEGORY and auto_captcha_enabled():
+            auto_category = prompt("是否自动选择分类，无需每次手动选择? [1]是 [2]否: ").strip()
             if auto_category == '1':
                 print("请选择默认分类:")
                 print("[1] 文史类 (ID: 6) - 推荐")
@@ -1660,15 +4939,19 @@ def main():
             logger.error("登录失败，程序退出")
             return
         
-        quiz = QuizSession()
-        quiz.start()
+        quiz = QuizSession(pipeline=args.pipeline or config.get('pipeline_mode', False))
+        with log_context():
+            quiz.start()
     
     except Exception as e:
         logger.error(f"程序运行出错: {str(e)}")
         import traceback
         logger.error(f"错误详情: {traceback.format_exc()}")
     finally:
-        input("按回车键退出程序...")
+        if metrics_dump:
+            metrics.dump(metrics_dump)
+        if interactive:
+            prompt("按回车键退出程序...")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,448 @@
+import json
+import time
+import zlib
+import struct
+import random
+import string
+import hashlib
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CATEGORIES = [
+    {'id': 6, 'name': '文史类'},
+    {'id': 7, 'name': '艺术类'},
+    {'id': 8, 'name': '理工类'},
+    {'id': 9, 'name': '财经类'},
+]
+
+
+def build_question_bank(count=200, seed=997):
+
+    rng = random.Random(seed)
+    bank = []
+    for i in range(count):
+        options = [f'模拟题{i + 1}的选项{chr(65 + j)}' for j in range(4)]
+        bank.append({
+            'question': f'模拟题{i + 1}：以下哪一项是正确答案？',
+            'answers': [
+                {'ans_hash': hashlib.md5(f'{i}-{j}'.encode()).hexdigest()[:16], 'ans_text': text}
+                for j, text in enumerate(options)
+            ],
+            'correct': rng.randint(0, 3),
+        })
+    return bank
+
+
+def blank_png(width=120, height=40):
+
+    raw = b''.join(b'\x00' + b'\xff' * width for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+
+
+class MockAccount:
+    def __init__(self, access_key):
+        self.access_key = access_key
+        self.mid = int(hashlib.md5(access_key.encode()).hexdigest()[:8], 16)
+        self.attempts = 0
+        self.day = time.strftime('%Y-%m-%d')
+        self.verified = False
+        self.questions = []
+        self.current = 0
+        self.correct = 0
+        self.finished = False
+
+
+class MockState:
+    def __init__(self, questions=100, daily_limit=3, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_412=0.0, captcha_accept_rate=1.0, scan_after=3.0, confirm_after=5.0,
+                 qrcode_ttl=180.0, token_ttl=15552000, retry_after=None, seed=997):
+        self.questions_per_quiz = questions
+        self.daily_limit = daily_limit
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_412 = rate_412
+        self.retry_after = retry_after
+        self.captcha_accept_rate = captcha_accept_rate
+        self.scan_after = scan_after
+        self.confirm_after = confirm_after
+        self.qrcode_ttl = qrcode_ttl
+        self.token_ttl = token_ttl
+        self.bank = build_question_bank(max(questions * 2, 200), seed)
+        self.accounts = {}
+        self.captchas = {}
+        self.qrcodes = {}
+        self.tokens = {}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.captcha_png = blank_png()
+
+    def account(self, access_key):
+
+        with self.lock:
+            if access_key not in self.accounts:
+                self.accounts[access_key] = MockAccount(access_key)
+            account = self.accounts[access_key]
+            today = time.strftime('%Y-%m-%d')
+            if account.day != today:
+                account.day = today
+                account.attempts = 0
+            return account
+
+    def issue_token(self, seed):
+
+        access_token = hashlib.md5(f'access-{seed}'.encode()).hexdigest()
+        refresh_token = hashlib.md5(f'refresh-{seed}'.encode()).hexdigest()
+        with self.lock:
+            self.tokens[access_token] = {
+                'refresh_token': refresh_token,
+                'expires': time.time() + self.token_ttl,
+            }
+        return {
+            'mid': int(hashlib.md5(access_token.encode()).hexdigest()[:8], 16),
+            'access_token': access_token,
+            'refresh_token': refresh_token,
+            'expires_in': int(self.token_ttl),
+        }
+
+    def token(self, access_token):
+
+        with self.lock:
+            if access_token not in self.tokens:
+                self.tokens[access_token] = {'refresh_token': None, 'expires': time.time() + self.token_ttl}
+            return self.tokens[access_token]
+
+    def random(self):
+
+        with self.lock:
+            return self.rng.random()
+
+
+def ok(data=None):
+
+    return {'code': 0, 'message': '0', 'ttl': 1, 'data': data if data is not None else {}}
+
+def fail(code, message):
+
+    return {'code': code, 'message': message, 'ttl': 1}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state = None
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def dispatch(self, method):
+
+        parsed = urllib.parse.urlsplit(self.path)
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(parsed.query).items()}
+        if method == 'POST':
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length).decode('utf-8') if length else ''
+            if 'application/json' in (self.headers.get('Content-Type') or ''):
+                params.update(json.loads(body or '{}'))
+            else:
+                params.update({k: v[-1] for k, v in urllib.parse.parse_qs(body).items()})
+
+        state = self.state
+        delay = state.latency + state.random() * state.jitter
+        if delay > 0:
+            time.sleep(delay)
+
+        if state.rate_412 and state.random() < state.rate_412:
+            return self.send_raw(412, b'Precondition Failed', 'text/plain', retry_after=state.retry_after)
+        if state.error_rate and state.random() < state.error_rate:
+            return self.send_raw(500, b'Internal Server Error', 'text/plain', retry_after=state.retry_after)
+
+        route = ROUTES.get((method, parsed.path))
+        if route is None and method == 'GET' and parsed.path.startswith('/captcha/'):
+            return self.send_raw(200, state.captcha_png, 'image/png')
+        if route is None:
+            return self.send_json(fail(-404, '啥都木有'), status=404)
+        return self.send_json(route(self, params))
+
+    def send_raw(self, status, body, content_type, retry_after=None):
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if retry_after is not None:
+            self.send_header('Retry-After', str(retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, payload, status=200):
+
+        self.send_raw(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def base_url(self):
+
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def require_account(self, params):
+
+        access_key = params.get('access_key')
+        if not access_key:
+            return None
+        return self.state.account(access_key)
+
+    def category(self, params):
+
+        account = self.require_account(params)
+        if account is None:
+            return fail(-101, '账号未登录')
+        if account.attempts >= self.state.daily_limit:
+            return fail(41099, '今日答题次数已达上限')
+        return ok({'categories': CATEGORIES})
+
+    def captcha(self, params):
+
+        account = self.require_account(params)
+        if account is None:
+            return fail(-101, '账号未登录')
+        with self.state.lock:
+            token = ''.join(self.state.rng.choices(string.ascii_lowercase + string.digits, k=32))
+            code = ''.join(self.state.rng.choices(string.ascii_lowercase + string.digits, k=5))
+            self.state.captchas[token] = code
+        return ok({'url': f'{self.base_url()}/captcha/{token}.png', 'token': token})
+
+    def captcha_submit(self, params):
+
+        account = self.require_account(params)
+        if account is None:
+            return fail(-101, '账号未登录')
+        if account.attempts >= self.state.daily_limit:
+            return fail(41099, '今日答题次数已达上限')
+        with self.state.lock:
+            expected = self.state.captchas.pop(params.get('bili_token'), None)
+        if expected is None:
+            return fail(41024, '验证码已过期')
+        if params.get('bili_code') != expected and self.state.random() >= self.state.captcha_accept_rate:
+            return fail(41023, '验证码错误')
+
+        with self.state.lock:
+            account.attempts += 1
+            account.verified = True
+            account.finished = False
+            account.current = 0
+            account.correct = 0
+            account.questions = self.state.rng.sample(range(len(self.state.bank)), self.state.questions_per_quiz)
+        return ok({'validate': True})
+
+    def question(self, params):
+
+        account = self.require_account(params)
+        if account is None:
+            return fail(-101, '账号未登录')
+        if account.finished:
+            return fail(41109, '答题已结束')
+        if not account.verified:
+            return fail(41103, '请先完成验证')
+        item = self.state.bank[account.questions[account.current]]
+        return ok({
+            'id': account.questions[account.current] + 1,
+            'question': item['question'],
+            'answers': [dict(ans) for ans in item['answers']],
+            'question_num': account.current + 1,
+        })
+
+    def answer_submit(self, params):
+
+        account = self.require_account(params)
+        if account is None:
+            return fail(-101, '账号未登录')
+        if account.finished:
+            return fail(41109, '答题已结束')
+        if not account.verified:
+            return fail(41103, '请先完成验证')
+        index = account.questions[account.current]
+        if str(params.get('id')) != str(index + 1):
+            return fail(41105, '题目不存在')
+
+        item = self.state.bank[index]
+        correct_answer = item['answers'][item['correct']]
+        is_correct = params.get('ans_hash') == correct_answer['ans_hash']
+        with self.state.lock:
+            account.correct += 1 if is_correct else 0
+            account.current += 1
+            is_last = account.current >= len(account.questions)
+            if is_last:
+                account.finished = True
+                account.verified = False
+        data = {'is_correct': is_correct, 'is_last': is_last}
+        if not is_correct:
+            data['correct_answer'] = dict(correct_answer)
+        return ok(data)
+
+    def answer_result(self, params):
+
+        account = self.require_account(params)
+        if account is None:
+            return fail(-101, '账号未登录')
+        score = round(account.correct * 100 / max(1, self.state.questions_per_quiz))
+        return ok({
+            'score': score,
+            'scores': [{'category': '文史类', 'score': score, 'total': 100}],
+        })
+
+    def qrcode_auth_code(self, params):
+
+        with self.state.lock:
+            auth_code = ''.join(self.state.rng.choices('0123456789abcdef', k=32))
+            self.state.qrcodes[auth_code] = time.time()
+        return ok({
+            'url': f'{self.base_url()}/qrcode/h5?auth_code={auth_code}',
+            'auth_code': auth_code,
+        })
+
+    def qrcode_poll(self, params):
+
+        auth_code = params.get('auth_code')
+        with self.state.lock:
+            created = self.state.qrcodes.get(auth_code)
+        if created is None:
+            return fail(86038, '二维码已失效')
+        elapsed = time.time() - created
+        if elapsed > self.state.qrcode_ttl:
+            return fail(86038, '二维码已失效')
+        if elapsed < self.state.scan_after:
+            return fail(86039, '二维码尚未确认')
+        if elapsed < self.state.confirm_after:
+            return fail(86090, '二维码已扫码未确认')
+
+        with self.state.lock:
+            self.state.qrcodes.pop(auth_code, None)
+        return ok(self.state.issue_token(auth_code))
+
+    def oauth2_info(self, params):
+
+        access_token = params.get('access_key')
+        if not access_token:
+            return fail(-101, '账号未登录')
+        token = self.state.token(access_token)
+        expires_in = int(token['expires'] - time.time())
+        if token.get('revoked') or expires_in <= 0:
+            return fail(-101, '账号未登录')
+        return ok({
+            'mid': MockAccount(access_token).mid,
+            'access_token': access_token,
+            'expires_in': expires_in,
+        })
+
+    def oauth2_refresh(self, params):
+
+        access_token = params.get('access_key')
+        refresh_token = params.get('refresh_token')
+        with self.state.lock:
+            token = self.state.tokens.get(access_token)
+        if not token or not refresh_token or token.get('refresh_token') != refresh_token or token.get('revoked'):
+            return fail(-903, 'refresh_token错误')
+        token['revoked'] = True
+        token_info = self.state.issue_token(f'{refresh_token}-{time.time_ns()}')
+        return ok({
+            'status': 0,
+            'message': '',
+            'token_info': token_info,
+            'cookie_info': {'cookies': [], 'domains': []},
+        })
+
+
+    def jfbym_custom_api(self, params):
+
+        if not params.get('image'):
+            return {'code': 10002, 'msg': '参数错误'}
+        return {'code': 10000, 'msg': '识别成功', 'data': {'code': 0, 'data': 'mock', 'time': 0.01}}
+
+
+ROUTES = {
+    ('GET', '/x/senior/v1/category'): MockHandler.category,
+    ('GET', '/x/senior/v1/captcha'): MockHandler.captcha,
+    ('POST', '/x/senior/v1/captcha/submit'): MockHandler.captcha_submit,
+    ('GET', '/x/senior/v1/question'): MockHandler.question,
+    ('POST', '/x/senior/v1/answer/submit'): MockHandler.answer_submit,
+    ('GET', '/x/senior/v1/answer/result'): MockHandler.answer_result,
+    ('POST', '/x/passport-tv-login/qrcode/auth_code'): MockHandler.qrcode_auth_code,
+    ('POST', '/x/passport-tv-login/qrcode/poll'): MockHandler.qrcode_poll,
+    ('GET', '/x/passport-login/oauth2/info'): MockHandler.oauth2_info,
+    ('POST', '/x/passport-login/oauth2/refresh_token'): MockHandler.oauth2_refresh,
+    ('POST', '/api/YmServer/customApi'): MockHandler.jfbym_custom_api,
+}
+
+
+def start_mock_server(host='127.0.0.1', port=0, **options):
+
+    state = MockState(**options)
+    handler = type('BoundMockHandler', (MockHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='mock-bilibili', daemon=True)
+    thread.start()
+    base_url = f'http://{host}:{server.server_address[1]}'
+    return server, state, base_url
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='B站硬核会员答题接口的本地模拟服务器')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--questions', type=int, default=100, help='每次答题的题目数')
+    parser.add_argument('--daily-limit', type=int, default=3, help='每个账号每日答题次数上限')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟(秒)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='在固定延迟之上增加的随机延迟上限(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回HTTP 500的概率')
+    parser.add_argument('--rate-412', type=float, default=0.0, help='返回HTTP 412(风控拦截)的概率')
+    parser.add_argument('--retry-after', type=int, default=None, help='返回412/500时附带的Retry-After秒数')
+    parser.add_argument('--captcha-accept-rate', type=float, default=1.0, help='验证码错误时仍然通过的概率')
+    parser.add_argument('--scan-after', type=float, default=3.0, help='二维码生成多少秒后视为已扫码')
+    parser.add_argument('--confirm-after', type=float, default=5.0, help='二维码生成多少秒后视为已确认登录')
+    parser.add_argument('--token-ttl', type=float, default=15552000, help='登录令牌的有效期(秒)，设置较小值可测试令牌刷新')
+    parser.add_argument('--seed', type=int, default=997, help='随机种子')
+    args = parser.parse_args()
+
+    server, _, base_url = start_mock_server(
+        host=args.host,
+        port=args.port,
+        questions=args.questions,
+        daily_limit=args.daily_limit,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_412=args.rate_412,
+        retry_after=args.retry_after,
+        captcha_accept_rate=args.captcha_accept_rate,
+        scan_after=args.scan_after,
+        confirm_after=args.confirm_after,
+        token_ttl=args.token_ttl,
+        seed=args.seed,
+    )
+    print(f'模拟服务器已启动: {base_url}')
+    print(f'使用方式: python biliraku.py --api-base {base_url}')
+    print(f'云码接口模拟地址: {base_url}/api/YmServer/customApi')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+from mock_server import start_mock_server
+
+
+HEAVY_MODULES = ['requests', 'urllib3', 'PIL', 'qrcode', 'asyncio', 'sqlite3', 'argparse', 'webbrowser', 'platform']
+
+CHILD_SCRIPT = """
+import sys, time, json
+started = time.perf_counter()
+import biliraku
+imported = time.perf_counter()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+biliraku.set_base_urls({base_url!r}, {base_url!r})
+response = biliraku.get({base_url!r} + '/x/senior/v1/category', params={{'access_key': 'startup-bench'}})
+finished = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (finished - started) * 1000,
+    'loaded': loaded,
+    'code': response.get('code'),
+}}))
+"""
+
+
+def run_child(code, env):
+
+    started = time.perf_counter()
+    output = subprocess.check_output([sys.executable, '-c', code], env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    wall_ms = (time.perf_counter() - started) * 1000
+    lines = output.decode('utf-8').strip().splitlines()
+    return wall_ms, lines[-1] if lines else ''
+
+def warm_bytecode():
+
+    import py_compile
+
+    try:
+        py_compile.compile(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'biliraku.py'), doraise=True)
+    except (OSError, py_compile.PyCompileError) as e:
+        print(f"无法预先生成字节码缓存，结果将包含编译耗时: {e}")
+
+def summarize(values):
+
+    values = sorted(values)
+    return {
+        'min': round(values[0], 2),
+        'median': round(statistics.median(values), 2),
+        'p90': round(values[min(len(values) - 1, int(0.9 * len(values)))], 2),
+        'max': round(values[-1], 2),
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='测量 biliraku 的冷启动耗时(导入耗时与首个请求耗时)')
+    parser.add_argument('--runs', type=int, default=10, help='启动次数')
+    parser.add_argument('--import-budget', type=float, default=50.0, help='导入耗时中位数预算(毫秒)')
+    parser.add_argument('--first-request-budget', type=float, default=200.0, help='从导入到首个请求完成的耗时中位数预算(毫秒)')
+    parser.add_argument('--no-warmup', action='store_true', help='测量前不预先生成字节码缓存(.pyc)，结果包含编译 biliraku.py 的耗时')
+    parser.add_argument('--output', default=None, help='结果JSON的保存路径')
+    args = parser.parse_args()
+
+    server, _, base_url = start_mock_server()
+    env = dict(os.environ, BILIRAKU_API_BASE=base_url, BILIRAKU_PASSPORT_BASE=base_url)
+    code = CHILD_SCRIPT.format(heavy=HEAVY_MODULES, base_url=base_url)
+
+    interpreter, wall, imports, first_requests, loaded = [], [], [], [], set()
+    try:
+        if not args.no_warmup:
+            warm_bytecode()
+        for _ in range(args.runs):
+            interpreter.append(run_child('pass', env)[0])
+            wall_ms, line = run_child(code, env)
+            result = json.loads(line)
+            wall.append(wall_ms)
+            imports.append(result['import_ms'])
+            first_requests.append(result['first_request_ms'])
+            loaded.update(result['loaded'])
+    finally:
+        server.shutdown()
+
+    report = {
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'warmup': not args.no_warmup,
+        'interpreter_ms': summarize(interpreter),
+        'process_ms': summarize(wall),
+        'import_ms': summarize(imports),
+        'first_request_ms': summarize(first_requests),
+        'heavy_modules_after_import': sorted(loaded),
+        'budget': {'import_ms': args.import_budget, 'first_request_ms': args.first_request_budget},
+    }
+
+    print(f"解释器启动: {report['interpreter_ms']['median']} ms")
+    print(f"导入 biliraku: {report['import_ms']['median']} ms (预算 {args.import_budget} ms)")
+    print(f"导入到首个请求完成: {report['first_request_ms']['median']} ms (预算 {args.first_request_budget} ms)")
+    print(f"导入后已加载的重量级模块: {', '.join(report['heavy_modules_after_import']) or '无'}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.output}")
+
+    over_budget = (
+        report['import_ms']['median'] > args.import_budget
+        or report['first_request_ms']['median'] > args.first_request_budget
+    )
+    if over_budget:
+        print("启动耗时超出预算")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()